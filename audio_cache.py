@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from audio_dsp import decode_wav, encode_wav
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "visuai", "tts")
+
+
+def phrase_key(text, lang, speed, voice):
+    return hashlib.sha256(f"{voice}\0{lang}\0{speed:.3f}\0{text}".encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    # Content-addressed store of rendered speech: float PCM in memory, 16-bit WAV files on disk.
+    # Both tiers evict least recently used entries once they exceed their byte budget.
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_memory_bytes=32 << 20, max_disk_bytes=256 << 20):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".wav")
+
+    def get(self, text, lang="en", speed=1.0, voice="gtts"):
+        key = phrase_key(text, lang, speed, voice)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return audio
+        if self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), "rb") as f:
+                    audio = decode_wav(f.read())
+                os.utime(self._path(key))
+            except Exception as e:
+                print(f"Discarding unreadable cached audio {key}: {e}")
+                os.remove(self._path(key))
+            else:
+                self._remember(key, audio)
+                with self._lock:
+                    self.hits += 1
+                return audio
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, text, audio, lang="en", speed=1.0, voice="gtts"):
+        key = phrase_key(text, lang, speed, voice)
+        self._remember(key, audio)
+        if self.cache_dir:
+            # Write under a temporary name so a concurrent reader never sees a partial file
+            staging = self._path(key) + f".{threading.get_ident()}.tmp"
+            with open(staging, "wb") as f:
+                f.write(encode_wav(audio))
+            os.replace(staging, self._path(key))
+            self._evict_disk()
+
+    def _remember(self, key, audio):
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = audio
+            self._memory_bytes += audio.samples.nbytes
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.samples.nbytes
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".wav"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory),
+                    "memory_bytes": self._memory_bytes}
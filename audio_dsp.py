@@ -0,0 +1,83 @@
+import io
+import subprocess
+import wave
+from collections import namedtuple
+
+import numpy as np
+
+# Mono float32 samples in [-1, 1]. This is the only audio representation between the TTS
+# backends and the output device, so nothing is re-encoded or copied through pydub on the way.
+Audio = namedtuple("Audio", ["samples", "sample_rate"])
+
+# gTTS produces 24 kHz mono MP3
+GTTS_SAMPLE_RATE = 24000
+
+
+def decode_mp3(data, sample_rate=GTTS_SAMPLE_RATE):
+    # One ffmpeg pass straight to float32 PCM; the result is a view on ffmpeg's output, not a copy
+    command = ["ffmpeg", "-loglevel", "error", "-i", "pipe:0", "-f", "f32le", "-ac", "1",
+               "-ar", str(sample_rate), "pipe:1"]
+    pcm = subprocess.run(command, input=data, check=True, capture_output=True).stdout
+    return Audio(np.frombuffer(pcm, dtype=np.float32), sample_rate)
+
+
+def pcm16_to_audio(data, sample_rate, channels=1):
+    samples = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return Audio(samples, sample_rate)
+
+
+def decode_wav(data):
+    with wave.open(io.BytesIO(data)) as f:
+        if f.getsampwidth() != 2:
+            raise ValueError("Only 16-bit PCM WAV is supported")
+        return pcm16_to_audio(f.readframes(f.getnframes()), f.getframerate(), f.getnchannels())
+
+
+def encode_wav(audio):
+    pcm = (np.clip(audio.samples, -1.0, 1.0) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(audio.sample_rate)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def time_stretch(audio, speed, frame_ms=30, tolerance_ms=10):
+    # WSOLA: overlap-add windowed frames taken every speed * hop input samples, each shifted within
+    # a small tolerance to line up with the natural continuation of the previous frame. Changes
+    # tempo without the pitch shift of the old resample-based speed-up.
+    if speed == 1.0 or len(audio.samples) == 0:
+        return audio
+    samples = audio.samples
+    frame = int(audio.sample_rate * frame_ms / 1000) // 2 * 2
+    hop_out = frame // 2
+    hop_in = hop_out * speed
+    tolerance = int(audio.sample_rate * tolerance_ms / 1000)
+    window = np.hanning(frame).astype(np.float32)
+
+    n_frames = max(int(len(samples) / hop_in), 1)
+    padded = np.concatenate([np.zeros(tolerance, np.float32), samples,
+                             np.zeros(2 * frame + tolerance + int(hop_in), np.float32)])
+    output = np.zeros(n_frames * hop_out + frame, dtype=np.float32)
+    weights = np.zeros_like(output)
+
+    previous = tolerance
+    for k in range(n_frames):
+        nominal = int(k * hop_in) + tolerance
+        offset = nominal
+        if k > 0:
+            continuation = padded[previous + hop_out:previous + hop_out + frame]
+            region = padded[nominal - tolerance:nominal + tolerance + frame]
+            offset = nominal - tolerance + int(np.argmax(np.correlate(region, continuation, mode="valid")))
+        start = k * hop_out
+        output[start:start + frame] += padded[offset:offset + frame] * window
+        weights[start:start + frame] += window
+        previous = offset
+
+    output /= np.maximum(weights, 1e-3)
+    target_length = int(len(samples) / speed)
+    return Audio(output[:target_length], audio.sample_rate)
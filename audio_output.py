@@ -0,0 +1,230 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+import metrics
+
+# Lower values play first and preempt anything less urgent that is currently playing
+PRIORITY_FEEDBACK = 0  # button presses and answers to the user
+PRIORITY_RESPONSE = 1
+PRIORITY_NARRATION = 2  # periodic scene narration, fine to drop when stale
+
+POLL_INTERVAL = 0.05
+
+
+class _Item:
+    def __init__(self, item_id, priority, chunks, tag):
+        self.id = item_id
+        self.priority = priority
+        self.chunks = chunks
+        self.tag = tag
+        self.enqueued_at = time.perf_counter()
+        self.cancelled = False
+        self.done = threading.Event()
+
+
+class AudioOutput:
+    # Single owner of the speaker. Utterances are queued by priority, more urgent ones cut off
+    # whatever less urgent one is playing, and a queued item with the same tag as a new one is
+    # replaced (a newer narration makes an older, not yet spoken one pointless).
+    #
+    # chunks is a queue.Queue filled by the producer with audio_dsp.Audio (or a Future of one)
+    # and terminated by None, so playback of the first sentence starts while the rest is synthesized.
+    def __init__(self):
+        self.preemptions = 0
+        self.replaced = 0
+        self.cancelled = 0
+        self._ids = itertools.count(1)
+        self._order = itertools.count()
+        self._heap = []
+        self._items = {}
+        self._current = None
+        self._waits = deque(maxlen=200)
+        # Audio written to the output stream and not yet played, read by the stream callback
+        self._pending = deque()
+        self._position = 0
+        self._buffer_lock = threading.Lock()
+        self._drained = threading.Event()
+        self._drained.set()
+        self._stream = None
+        self._stream_rate = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="audio-output", daemon=True)
+        self._thread.start()
+
+    def submit(self, chunks, priority=PRIORITY_RESPONSE, tag=None):
+        with self._cond:
+            item = _Item(next(self._ids), priority, chunks, tag)
+            if tag is not None:
+                for _, _, queued in self._heap:
+                    if queued.tag == tag and not queued.cancelled:
+                        self._cancel(queued)
+                        self.replaced += 1
+            current = self._current
+            if current is not None and priority < current.priority:
+                self._cancel(current)
+                self.preemptions += 1
+            heapq.heappush(self._heap, (priority, next(self._order), item))
+            self._items[item.id] = item
+            self._cond.notify()
+            return item.id
+
+    def _cancel(self, item):
+        item.cancelled = True
+        item.done.set()
+
+    def cancel(self, item_id):
+        with self._cond:
+            item = self._items.get(item_id)
+            if item is None or item.cancelled:
+                return False
+            self._cancel(item)
+            self.cancelled += 1
+            return True
+
+    def stop_all(self):
+        with self._cond:
+            for _, _, item in self._heap:
+                self._cancel(item)
+            if self._current is not None:
+                self._cancel(self._current)
+            self.cancelled += len(self._heap) + (self._current is not None)
+
+    def wait(self, item_id, timeout=None):
+        with self._cond:
+            item = self._items.get(item_id)
+        return item is None or item.done.wait(timeout)
+
+    def stats(self):
+        with self._cond:
+            waits = np.array(self._waits) * 1000
+            queued = sum(1 for _, _, item in self._heap if not item.cancelled)
+        return {
+            "queued": queued,
+            "preemptions": self.preemptions,
+            "replaced": self.replaced,
+            "cancelled": self.cancelled,
+            "wait_mean_ms": float(waits.mean()) if waits.size else 0.0,
+            "wait_p95_ms": float(np.percentile(waits, 95)) if waits.size else 0.0,
+        }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._heap)
+                _, _, item = heapq.heappop(self._heap)
+                if item.cancelled:
+                    self._items.pop(item.id, None)
+                    continue
+                self._current = item
+                self._waits.append(time.perf_counter() - item.enqueued_at)
+            try:
+                self._play_item(item)
+            except Exception as e:
+                print(f"An error occurred during audio playback: {e}")
+            finally:
+                with self._cond:
+                    self._current = None
+                    self._items.pop(item.id, None)
+                item.done.set()
+
+    def _next_chunk(self, item):
+        # Waits for the next piece of audio without ever blocking past a cancellation
+        while not item.cancelled:
+            try:
+                chunk = item.chunks.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if isinstance(chunk, Exception):
+                raise chunk
+            while isinstance(chunk, Future):
+                if item.cancelled:
+                    return None
+                try:
+                    return chunk.result(timeout=POLL_INTERVAL)
+                except FutureTimeoutError:
+                    continue
+            return chunk
+        return None
+
+    def _play_item(self, item):
+        # Sentences are appended to the open stream as soon as they are synthesized, so they play
+        # back to back; cancelling flushes whatever has not reached the device yet
+        started = None
+        while True:
+            audio = self._next_chunk(item)
+            if audio is None or item.cancelled:
+                break
+            self._ensure_stream(audio.sample_rate, item)
+            self._write(audio.samples)
+            started = started or time.perf_counter()
+        self._wait_drained(item)
+        if item.cancelled:
+            self._flush()
+        elif started is not None:
+            metrics.observe("tts_playback", time.perf_counter() - started)
+
+    def _ensure_stream(self, sample_rate, item):
+        # One output stream stays open per sample rate; it plays silence while nothing is queued
+        if self._stream is not None and self._stream_rate == sample_rate:
+            return
+        import sounddevice as sd
+
+        if self._stream is not None:
+            self._wait_drained(item)
+            self._stream.close()
+            self._stream = None
+        self._stream = sd.OutputStream(samplerate=sample_rate, channels=1, dtype="float32", callback=self._callback)
+        self._stream_rate = sample_rate
+        self._stream.start()
+
+    def _callback(self, outdata, frames, time_info, status):
+        filled = 0
+        with self._buffer_lock:
+            while filled < frames and self._pending:
+                samples = self._pending[0]
+                chunk = samples[self._position:self._position + frames - filled]
+                outdata[filled:filled + len(chunk), 0] = chunk
+                filled += len(chunk)
+                self._position += len(chunk)
+                if self._position >= len(samples):
+                    self._pending.popleft()
+                    self._position = 0
+            if not self._pending:
+                self._drained.set()
+        outdata[filled:] = 0
+
+    def _write(self, samples):
+        with self._buffer_lock:
+            self._pending.append(samples.reshape(-1))
+            self._drained.clear()
+
+    def _flush(self):
+        with self._buffer_lock:
+            self._pending.clear()
+            self._position = 0
+            self._drained.set()
+
+    def _wait_drained(self, item):
+        while not self._drained.wait(POLL_INTERVAL):
+            if item.cancelled:
+                return
+
+
+_output = None
+_output_lock = threading.Lock()
+
+
+def get_audio_output():
+    global _output
+    if _output is None:
+        with _output_lock:
+            if _output is None:
+                _output = AudioOutput()
+    return _output
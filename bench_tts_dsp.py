@@ -0,0 +1,71 @@
+import argparse
+import io
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+from pydub import AudioSegment
+
+from audio_dsp import GTTS_SAMPLE_RATE, decode_mp3, time_stretch
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare the pydub speed-up path with the NumPy DSP path")
+    parser.add_argument("--durations", nargs="+", default=[2.0, 8.0, 20.0], type=float,
+                        help="Clip lengths in seconds; a short prompt, a typical answer and a long narration")
+    parser.add_argument("--speed", default=1.5, type=float)
+    parser.add_argument("--repeats", default=5, type=int)
+    return parser.parse_args()
+
+
+def make_mp3(duration):
+    # Speech-like test signal: a few harmonics with a syllable-rate envelope, encoded like gTTS output
+    t = np.arange(int(duration * GTTS_SAMPLE_RATE)) / GTTS_SAMPLE_RATE
+    signal = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate([140, 280, 420, 560]))
+    signal *= 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)
+    pcm = (signal / np.abs(signal).max() * 0.5 * 32767).astype(np.int16).tobytes()
+    command = ["ffmpeg", "-loglevel", "error", "-f", "s16le", "-ar", str(GTTS_SAMPLE_RATE), "-ac", "1",
+               "-i", "pipe:0", "-f", "mp3", "pipe:1"]
+    return subprocess.run(command, input=pcm, check=True, capture_output=True).stdout
+
+
+def pydub_path(mp3, speed):
+    # What speak_text used to do, plus the conversion needed to hand the result to an output stream
+    audio = AudioSegment.from_file(io.BytesIO(mp3), format="mp3")
+    new_sample_rate = int(audio.frame_rate * speed)
+    faster_audio = audio._spawn(audio.raw_data, overrides={'frame_rate': new_sample_rate})
+    faster_audio = faster_audio.set_frame_rate(audio.frame_rate)
+    samples = np.array(faster_audio.get_array_of_samples(), dtype=np.float32)
+    return samples / float(1 << (8 * faster_audio.sample_width - 1))
+
+
+def numpy_path(mp3, speed):
+    return time_stretch(decode_mp3(mp3), speed).samples
+
+
+def measure(fn, mp3, speed, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(mp3, speed)
+        latencies.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn(mp3, speed)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return np.median(latencies) * 1000, peak / (1 << 20)
+
+
+def main():
+    args = parse_arguments()
+    print(f"{'clip s':>6} {'path':>6} {'median ms':>10} {'peak MiB':>9}")
+    for duration in args.durations:
+        mp3 = make_mp3(duration)
+        for name, fn in (("pydub", pydub_path), ("numpy", numpy_path)):
+            latency, peak = measure(fn, mp3, args.speed, args.repeats)
+            print(f"{duration:>6.1f} {name:>6} {latency:>10.1f} {peak:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from main import annotate_frame, generate_scene_description, load_yolo_model
+from frame_sources import open_source
+from llm_client import StubClient, configure as configure_llm
+from model_backends import BACKENDS, DEFAULT_CACHE_DIR, PRECISIONS, VARIANTS
+from scene_cache import SceneDescriptionCache
+from speech import split_sentences
+from audio_dsp import time_stretch
+from tracking import DetectionScheduler, TrackedDetector
+from tts_backends import SilentBackend
+
+STAGES = ("capture", "inference", "draw_boxes", "describe", "tts", "frame")
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay a recording through detection, description and speech "
+                                                 "with stubbed LLM and TTS, and report per-stage latency as JSON")
+    parser.add_argument("source", help="Video file, image or directory of images")
+    parser.add_argument("--resolution", default=[1280, 720], nargs=2, type=int)
+    parser.add_argument("--horizontal-fov", default=70.0, type=float)
+    parser.add_argument("--fps", default=0.0, type=float,
+                        help="Replay rate; 0 reads frames as fast as the pipeline takes them")
+    parser.add_argument("--max-frames", default=None, type=int)
+    parser.add_argument("--warmup", default=3, type=int, help="Frames processed before timing starts")
+    parser.add_argument("--model", default="l", choices=VARIANTS)
+    parser.add_argument("--backend", default="torch", choices=BACKENDS)
+    parser.add_argument("--imgsz", default=640, type=int)
+    parser.add_argument("--precision", default="fp32", choices=PRECISIONS)
+    parser.add_argument("--conf", default=None, type=float)
+    parser.add_argument("--iou", default=None, type=float)
+    parser.add_argument("--model-cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--detect-every", default=1, type=int,
+                        help="Run the detector every N frames and track boxes in between")
+    parser.add_argument("--describe-every", default=30, type=int,
+                        help="Generate and synthesize a scene description every N frames; 0 never describes")
+    parser.add_argument("--llm-delay", default=0.0, type=float,
+                        help="Seconds the stub language model takes per response")
+    parser.add_argument("--speech-speed", default=1.5, type=float)
+    parser.add_argument("--json", default=None, help="Also write the report to this file")
+    return parser.parse_args()
+
+
+def summarize(latencies):
+    latencies = np.array(latencies) * 1000
+    if latencies.size == 0:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "count": int(latencies.size),
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(latencies.max()),
+    }
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed(latencies, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    latencies.append(time.perf_counter() - start)
+    return result
+
+
+def run(args):
+    frame_width, frame_height = args.resolution
+    cap = open_source(args.source, frame_width, frame_height, fps=args.fps)
+    model = load_yolo_model(args.model, args.backend, args.imgsz, args.model_cache_dir, args.precision,
+                            args.conf, args.iou)
+    detector = model
+    if args.detect_every > 1:
+        detector = TrackedDetector(model, DetectionScheduler(args.detect_every))
+    # Everything after detection runs offline and deterministically
+    configure_llm(client_factory=lambda: StubClient(delay=args.llm_delay))
+    speech_backend = SilentBackend()
+    # A zero TTL means every description goes to the (stub) model, like a scene that keeps changing
+    cache = SceneDescriptionCache(ttl=0.0)
+
+    latencies = {stage: [] for stage in STAGES}
+    frames = 0
+    started_at = time.perf_counter()
+    while args.max_frames is None or frames < args.max_frames:
+        frame_start = time.perf_counter()
+        ret, frame = timed(latencies["capture"], cap.read)
+        if not ret:
+            break
+        results = timed(latencies["inference"], detector, frame, agnostic_nms=True, verbose=False)
+        object_descriptions, scene_summary, _ = timed(latencies["draw_boxes"], annotate_frame, frame, results, model,
+                                                      args.horizontal_fov, frame_width, frame_height)
+        if args.describe_every > 0 and frames % args.describe_every == 0:
+            description = timed(latencies["describe"], generate_scene_description, object_descriptions,
+                                scene_summary, cache)
+            for sentence in split_sentences(description or ""):
+                timed(latencies["tts"], lambda: time_stretch(speech_backend.synthesize(sentence), args.speech_speed))
+        latencies["frame"].append(time.perf_counter() - frame_start)
+
+        frames += 1
+        if frames == args.warmup:
+            # Drop the warm-up frames, which include lazy initialisation inside the model
+            latencies = {stage: [] for stage in STAGES}
+            started_at = time.perf_counter()
+    cap.release()
+
+    elapsed = time.perf_counter() - started_at
+    timed_frames = len(latencies["frame"])
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": vars(args),
+        "frames": timed_frames,
+        "throughput_fps": timed_frames / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {stage: summarize(values) for stage, values in latencies.items()},
+    }
+
+
+def main():
+    args = parse_arguments()
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
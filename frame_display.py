@@ -0,0 +1,83 @@
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+from kivy.graphics.texture import Texture
+
+# Preview sizes are rounded to this many pixels so small layout changes don't reallocate the texture
+PREVIEW_STEP = 16
+
+
+class FrameDisplay:
+    # Shows BGR camera frames on a Kivy Image through one texture per resolution. The texture is
+    # flipped once through its UV coordinates, so frames are uploaded as they come from OpenCV with
+    # no flip and no tobytes() copy. With preview=True, frames larger than the widget are downscaled
+    # before upload.
+    def __init__(self, image, preview=True, window=120):
+        self.image = image
+        self.preview = preview
+        self.texture = None
+        self.allocations = 0
+        self.buffer_copies = 0
+        self._zero_copy = True
+        self._alloc_times = deque(maxlen=window)
+        self._upload_times = deque(maxlen=window)
+
+    def target_size(self, frame_width, frame_height):
+        width, height = self.image.size
+        scale = min(width / frame_width, height / frame_height)
+        if not self.preview or scale >= 1.0 or width <= 1 or height <= 1:
+            return frame_width, frame_height
+        width = max(int(frame_width * scale) // PREVIEW_STEP * PREVIEW_STEP, PREVIEW_STEP)
+        height = max(int(frame_height * width / frame_width), 1)
+        return width, height
+
+    def _ensure_texture(self, width, height):
+        if self.texture is not None and self.texture.size == (width, height):
+            return
+        start = time.perf_counter()
+        self.texture = Texture.create(size=(width, height), colorfmt='bgr')
+        # OpenCV rows run top to bottom, GL textures bottom to top
+        self.texture.flip_vertical()
+        self.image.texture = self.texture
+        self.allocations += 1
+        self._alloc_times.append(time.perf_counter() - start)
+
+    def _blit(self, frame):
+        # blit_buffer takes any buffer; some Kivy builds only accept signed char views, and the
+        # bytes fallback (one copy) is remembered so the failed attempt is not repeated per frame
+        if self._zero_copy:
+            try:
+                self.texture.blit_buffer(frame.reshape(-1).view(np.int8), colorfmt='bgr', bufferfmt='ubyte')
+                return
+            except (TypeError, ValueError):
+                self._zero_copy = False
+        self.buffer_copies += 1
+        self.texture.blit_buffer(frame.tobytes(), colorfmt='bgr', bufferfmt='ubyte')
+
+    def show(self, frame):
+        start = time.perf_counter()
+        frame_height, frame_width = frame.shape[:2]
+        width, height = self.target_size(frame_width, frame_height)
+        if (width, height) != (frame_width, frame_height):
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        elif not frame.flags.c_contiguous:
+            frame = np.ascontiguousarray(frame)
+        self._ensure_texture(width, height)
+        self._blit(frame)
+        # Redraw the Image with the new contents of the same texture
+        self.image.canvas.ask_update()
+        self._upload_times.append(time.perf_counter() - start)
+
+    def stats(self):
+        uploads = np.array(self._upload_times) * 1000
+        allocs = np.array(self._alloc_times) * 1000
+        return {
+            "texture_size": self.texture.size if self.texture is not None else None,
+            "allocations": self.allocations,
+            "alloc_ms": float(allocs.mean()) if allocs.size else 0.0,
+            "upload_mean_ms": float(uploads.mean()) if uploads.size else 0.0,
+            "upload_p95_ms": float(np.percentile(uploads, 95)) if uploads.size else 0.0,
+            "buffer_copies": self.buffer_copies,
+        }
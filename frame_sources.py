@@ -0,0 +1,94 @@
+import glob
+import os
+import time
+
+import cv2
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class ImageFolderCapture:
+    # cv2.VideoCapture look-alike over still images: a single file or every image in a directory,
+    # in name order. read() returns (False, None) after the last image unless loop is set.
+    def __init__(self, path, loop=False):
+        if os.path.isdir(path):
+            self.paths = sorted(p for p in glob.glob(os.path.join(path, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            self.paths = [path]
+        self.loop = loop
+        self.position = 0
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def read(self):
+        if self.position >= len(self.paths):
+            if not self.loop or not self.paths:
+                return False, None
+            self.position = 0
+        frame = cv2.imread(self.paths[self.position])
+        self.position += 1
+        return frame is not None, frame
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.paths))
+        return 0.0
+
+    def release(self):
+        self.paths = []
+
+
+class ReplayCapture:
+    # Wraps a file-backed capture: frames are resized to the resolution the rest of the app was
+    # configured for, and optionally paced at a fixed rate (fps=None or 0 replays as fast as it is read).
+    def __init__(self, cap, frame_width, frame_height, fps=None):
+        self.cap = cap
+        self.size = (frame_width, frame_height)
+        self.interval = 1.0 / fps if fps else 0.0
+        self._next_frame_at = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        if self.interval:
+            now = time.perf_counter()
+            if self._next_frame_at is not None and now < self._next_frame_at:
+                time.sleep(self._next_frame_at - now)
+            self._next_frame_at = max(now, self._next_frame_at or now) + self.interval
+        ret, frame = self.cap.read()
+        if ret and (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return ret, frame
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+
+def open_source(source, frame_width, frame_height, fps=None, loop=False):
+    # source is a camera index ("0", 1, ...), a video file, an image file or a directory of images
+    if source is None or str(source).isdigit():
+        cap = cv2.VideoCapture(int(source or 0))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_height)
+        return cap
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Video source {source} does not exist")
+    if os.path.isdir(source) or source.lower().endswith(IMAGE_EXTENSIONS):
+        cap = ImageFolderCapture(source, loop)
+    else:
+        cap = cv2.VideoCapture(source)
+        if fps is None:
+            # Video files play back at their recorded rate, like a camera would deliver them
+            fps = cap.get(cv2.CAP_PROP_FPS) or None
+    return ReplayCapture(cap, frame_width, frame_height, fps)
@@ -7,11 +7,29 @@ from kivy.core.window import Window
 from kivy.graphics import Color, Rectangle
 from kivy.clock import Clock
 import threading
-import speech_recognition as sr
-from gtts import gTTS
-from playsound import playsound
-import os
-import tempfile
+from speech_input import NoSpeechError, RecognitionError, get_voice_input
+from speech import speak_streamed
+from audio_output import PRIORITY_FEEDBACK, get_audio_output
+from intents import HOME_PATTERNS, IntentRouter
+
+WELCOME_MESSAGE = "Welcome to VisuAI! You can say 'instructions' for instructions, 'purpose' for purpose, 'functions' for functions, or 'login' to go to the login screen. The 'Repeat' button is on the far left and the 'Speak' button is on the far right."
+INSTRUCTIONS_RESPONSE = "Instructions: The 'Repeat' button is on the far left and the 'Speak' button is on the far right. Use the 'Describe Scene' button to get a description of the scene, use the 'Audio Input' button to give voice commands, and use the 'Reset' button to restart the video feed."
+PURPOSE_RESPONSE = "VisuAI assists visually impaired users by describing scenes and processing audio input."
+FUNCTIONS_RESPONSE = "Functions include object detection and description, voice command processing, and text-to-speech responses."
+UNKNOWN_COMMAND_RESPONSE = "Sorry, I didn't understand the command."
+NOT_UNDERSTOOD_RESPONSE = "Sorry, I did not understand that."
+REQUEST_ERROR_RESPONSE = "Sorry, there was an error with the audio request."
+
+# Everything HomeScreen can say, pre-rendered at startup
+SPOKEN_PHRASES = [WELCOME_MESSAGE, INSTRUCTIONS_RESPONSE, PURPOSE_RESPONSE, FUNCTIONS_RESPONSE,
+                  UNKNOWN_COMMAND_RESPONSE, NOT_UNDERSTOOD_RESPONSE, REQUEST_ERROR_RESPONSE]
+
+INTENT_RESPONSES = {
+    "instructions": INSTRUCTIONS_RESPONSE,
+    "purpose": PURPOSE_RESPONSE,
+    "functions": FUNCTIONS_RESPONSE,
+}
+
 # Set background color
 Window.clearcolor = (0.1, 0.1, 0.1, 1)  # Dark background for a futuristic look
 
@@ -99,17 +117,16 @@ class HomeScreen(Screen):
 
         self.add_widget(layout)
 
+        self.intent_router = IntentRouter(HOME_PATTERNS)
+
         # Initialize and speak welcome message
-        self.last_message = "Welcome to VisuAI! You can say 'instructions' for instructions, 'purpose' for purpose, 'functions' for functions, or 'login' to go to the login screen. The 'Repeat' button is on the far left and the 'Speak' button is on the far right."
+        self.last_message = WELCOME_MESSAGE
         self.speak(self.last_message)
 
     def speak(self, text):
-        # Use gTTS for text-to-speech
-        tts = gTTS(text=text, lang='en', slow=False)
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-            tts.save(temp_file.name)
-            playsound(temp_file.name)
-        os.remove(temp_file.name)  # Remove the temporary file after playing
+        # Fixed prompts come from the phrase cache, anything else is synthesized in memory.
+        # Queued as user feedback, so it interrupts anything less urgent that is playing.
+        speak_streamed(text, speed=1.0, priority=PRIORITY_FEEDBACK)
 
     def go_to_login(self, instance):
         # Stop any ongoing speech before transitioning
@@ -121,35 +138,32 @@ class HomeScreen(Screen):
         # Start speech recognition in a new thread
         threading.Thread(target=self.record_speech).start()
 
+    def on_wake_word(self):
+        self.start_recording(None)
+
     def record_speech(self):
-        recognizer = sr.Recognizer()
-        with sr.Microphone() as source:
-            print("Listening...")
-            try:
-                audio = recognizer.listen(source)
-                text = recognizer.recognize_google(audio)
-                print(f"You said: {text}")
-                # Process the recognized text
-                self.process_speech(text)
-            except sr.UnknownValueError:
-                print("Sorry, I did not understand that.")
-                self.speak("Sorry, I did not understand that.")
-            except sr.RequestError as e:
-                print(f"Could not request results; {e}")
-                self.speak("Sorry, there was an error with the audio request.")
+        print("Listening...")
+        try:
+            text = get_voice_input().listen().text
+            print(f"You said: {text}")
+            # Process the recognized text
+            self.process_speech(text)
+        except NoSpeechError:
+            print("Sorry, I did not understand that.")
+            self.speak(NOT_UNDERSTOOD_RESPONSE)
+        except RecognitionError as e:
+            print(f"Could not request results; {e}")
+            self.speak(REQUEST_ERROR_RESPONSE)
 
     def process_speech(self, text):
-        if 'instructions' in text.lower():
-            response = "Instructions: The 'Repeat' button is on the far left and the 'Speak' button is on the far right. Use the 'Describe Scene' button to get a description of the scene, use the 'Audio Input' button to give voice commands, and use the 'Reset' button to restart the video feed."
-        elif 'purpose' in text.lower():
-            response = "VisuAI assists visually impaired users by describing scenes and processing audio input."
-        elif 'functions' in text.lower():
-            response = "Functions include object detection and description, voice command processing, and text-to-speech responses."
-        elif 'login' in text.lower():
+        intent = self.intent_router.classify(text)
+        if intent is None:
+            response = UNKNOWN_COMMAND_RESPONSE
+        elif intent.name == 'login':
             self.go_to_login(None)
             return
         else:
-            response = "Sorry, I didn't understand the command."
+            response = INTENT_RESPONSES[intent.name]
         
         self.last_message = response
         self.speak(response)
@@ -159,5 +173,5 @@ class HomeScreen(Screen):
         self.speak(self.last_message)
     
     def stop_speech(self):
-        # Since gTTS and playsound do not have direct support for stopping playback, we handle this by not playing overlapping audio.
-        pass
+        # Cut off whatever is playing and drop anything still queued
+        get_audio_output().stop_all()
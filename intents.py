@@ -0,0 +1,160 @@
+import re
+from collections import namedtuple
+
+# A recognised command: the intent name and the named groups its pattern captured
+Intent = namedtuple("Intent", ["name", "slots"])
+
+# Irregular plurals of the COCO labels; regular ones are handled by stripping the suffix.
+# Labels that are already plural, or don't change, map to themselves.
+IRREGULAR_PLURALS = {
+    "people": "person",
+    "persons": "person",
+    "men": "person",
+    "women": "person",
+    "children": "person",
+    "kids": "person",
+    "mice": "mouse",
+    "knives": "knife",
+    "sheep": "sheep",
+    "skis": "skis",
+    "scissors": "scissors",
+}
+
+# The other way round for spoken answers; the first plural listed for a label is the one used
+PLURAL_FORMS = {singular: plural for plural, singular in reversed(list(IRREGULAR_PLURALS.items()))}
+
+DIRECTION_WORDS = {
+    "left": "left",
+    "right": "right",
+    "front": "center",
+    "ahead": "center",
+    "middle": "center",
+    "center": "center",
+    "centre": "center",
+}
+
+OBJECT = r"(?:the |a |an |any |my )?(?P<object>[a-z][a-z ]*?)"
+
+SCENE_PATTERNS = [
+    ("count", r"\bhow many " + OBJECT + r"(?: are| is| do| can|$| in| around| here| there)"),
+    ("count", r"\b(?:is|are) there (?:any |a |an )?" + OBJECT + r"(?: here| around| in front| nearby)?$"),
+    ("color", r"\bwhat colou?r (?:is|are) " + OBJECT + r"$"),
+    ("color", r"\bwhat is the colou?r of " + OBJECT + r"$"),
+    ("direction", r"\bwhat(?:'s| is| do you see)? (?:on|to|at|in) (?:my |the )?(?P<direction>left|right|front|middle|center|centre)\b"),
+    ("direction", r"\bwhat(?:'s| is) (?P<direction>ahead)\b"),
+    ("location", r"\bwhere (?:is|are|'s) " + OBJECT + r"$"),
+]
+
+HOME_PATTERNS = [
+    ("instructions", r"\binstructions?\b"),
+    ("purpose", r"\bpurpose\b"),
+    ("functions", r"\bfunctions?\b"),
+    ("login", r"\blog ?in\b"),
+]
+
+
+def normalize(text):
+    return re.sub(r"[^a-z' ]+", " ", text.lower().replace("’", "'")).strip()
+
+
+class IntentRouter:
+    # Ordered, precompiled patterns; the first one that matches the normalised transcript wins.
+    # Classification is a handful of regex searches, so known commands never wait on the network.
+    def __init__(self, patterns):
+        self.patterns = [(name, re.compile(pattern)) for name, pattern in patterns]
+
+    def classify(self, text):
+        text = normalize(text)
+        for name, pattern in self.patterns:
+            match = pattern.search(text)
+            if match:
+                return Intent(name, {k: v.strip() for k, v in match.groupdict().items() if v})
+        return None
+
+
+def pluralize(name, count):
+    if count == 1:
+        return name
+    if name in PLURAL_FORMS:
+        return PLURAL_FORMS[name]
+    if name.endswith(("s", "sh", "ch", "x")):
+        return name + "es"
+    return name + "s"
+
+
+def with_article(name):
+    return ("an " if name[0] in "aeiou" else "a ") + name
+
+
+class SceneQueryRouter:
+    # Answers count, location and colour questions from the objects annotate_frame produced for
+    # the latest frame. answer() returns None for anything it cannot answer, which the caller
+    # sends on to the LLM.
+    def __init__(self, labels, patterns=SCENE_PATTERNS):
+        self.router = IntentRouter(patterns)
+        self.labels = set(labels)
+
+    def resolve_label(self, phrase):
+        # "people" -> "person", "cell phones" -> "cell phone", "things"/"objects" -> every label
+        words = phrase.split()
+        while words and words[0] in ("of", "the", "a", "an", "any", "my"):
+            words = words[1:]
+        if not words:
+            return None
+        if words[-1] in ("things", "objects", "items", "thing", "object"):
+            return "*"
+        head = IRREGULAR_PLURALS.get(words[-1])
+        candidates = [head] if head else [words[-1], words[-1][:-1], words[-1][:-2]]
+        for candidate in candidates:
+            label = " ".join(words[:-1] + [candidate])
+            if label in self.labels:
+                return label
+        return None
+
+    def answer(self, text, objects):
+        intent = self.router.classify(text)
+        if intent is None:
+            return None
+        if intent.name == "direction":
+            return self.answer_direction(DIRECTION_WORDS[intent.slots["direction"]], objects)
+        label = self.resolve_label(intent.slots.get("object", ""))
+        if label is None:
+            return None
+        matches = [o for o in objects if label == "*" or o["class_name"] == label]
+        if intent.name == "count":
+            return self.answer_count(label, matches)
+        if not matches:
+            return f"I don't see {with_article(label) if label != '*' else 'anything'} right now."
+        if intent.name == "location":
+            return self.answer_location(matches)
+        return self.answer_color(matches)
+
+    def answer_count(self, label, matches):
+        if label == "*":
+            return f"I can see {len(matches)} {pluralize('object', len(matches))}."
+        if not matches:
+            return f"I don't see any {pluralize(label, 2)} right now."
+        verb = "is" if len(matches) == 1 else "are"
+        return f"There {verb} {len(matches)} {pluralize(label, len(matches))}."
+
+    def answer_location(self, matches):
+        parts = [f"{with_article(o['size'] + ' ' + o['class_name'])} at the {o['direction']}, "
+                 f"{abs(o['h_angle']):.0f} degrees to the {'left' if o['h_angle'] < 0 else 'right'}"
+                 for o in matches]
+        return "I see " + "; ".join(parts) + "."
+
+    def answer_color(self, matches):
+        parts = [f"the {o['class_name']} at the {o['direction']} is {o['color']}" for o in matches]
+        text = "; ".join(parts)
+        return text[0].upper() + text[1:] + "."
+
+    def answer_direction(self, horizontal, objects):
+        names = [o["class_name"] for o in objects if o["direction"].split()[1] == horizontal]
+        where = "in front of you" if horizontal == "center" else f"on your {horizontal}"
+        if not names:
+            return f"I don't see anything {where}."
+        counts = {}
+        for name in names:
+            counts[name] = counts.get(name, 0) + 1
+        listed = ", ".join(f"{count} {pluralize(name, count)}" for name, count in counts.items())
+        return f"{where[0].upper() + where[1:]} I see {listed}."
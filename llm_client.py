@@ -0,0 +1,278 @@
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import metrics
+
+DEFAULT_MODEL = "gpt-4o"
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+# Seconds between checks for supersession while waiting on a slot or a streamed chunk
+POLL_INTERVAL = 0.05
+
+
+class LLMTimeoutError(Exception):
+    pass
+
+
+class SupersededError(Exception):
+    pass
+
+
+class LLMProviderError(Exception):
+    # Raised in place of g4f's provider errors, so callers can handle them without importing g4f
+    pass
+
+
+def is_provider_error(error):
+    return type(error).__module__.startswith("g4f")
+
+
+def default_client():
+    # g4f imports every provider module, so it is only loaded on the first request
+    from g4f.client import Client
+
+    return Client()
+
+
+class _Request:
+    # Lets the caller stop waiting as soon as the response arrives, the deadline passes,
+    # or a newer request on the same channel replaces this one.
+    def __init__(self):
+        self.future = None
+        self.superseded = False
+        self.done = threading.Event()
+
+    def attach(self, future):
+        self.future = future
+        future.add_done_callback(lambda f: self.done.set())
+
+    def supersede(self):
+        self.superseded = True
+        if self.future is not None:
+            self.future.cancel()
+        self.done.set()
+
+
+def run_in_thread(fn, *args):
+    # Future for fn(*args) on its own daemon thread. A provider call that hangs keeps only its own
+    # thread busy; nothing else ever queues behind it.
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="llm", daemon=True).start()
+    return future
+
+
+class LLMClient:
+    # One process-wide chat client. Each request runs on its own thread so callers can enforce a
+    # deadline without blocking on the socket. At most max_workers requests are waited on at once;
+    # a request gives its slot back when it finishes, times out or is superseded, so calls that
+    # hang past their deadline don't keep later requests waiting.
+    def __init__(self, client_factory=default_client, timeout=20.0, max_workers=2, model=DEFAULT_MODEL):
+        self.client_factory = client_factory
+        self.timeout = timeout
+        self.model = model
+        self.timeouts = 0
+        self.superseded = 0
+        self._client = None
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self.client_factory()
+        return self._client
+
+    def _begin(self, channel):
+        request = _Request()
+        if channel is not None:
+            with self._lock:
+                previous = self._in_flight.get(channel)
+                if previous is not None:
+                    previous.supersede()
+                    self.superseded += 1
+                self._in_flight[channel] = request
+        return request
+
+    def _finish(self, channel, request):
+        if channel is not None:
+            with self._lock:
+                if self._in_flight.get(channel) is request:
+                    del self._in_flight[channel]
+
+    def _acquire(self, request, deadline, timeout):
+        # Waits for a free slot, giving up early if the request is superseded meanwhile
+        while not self._slots.acquire(timeout=POLL_INTERVAL):
+            if request.superseded:
+                self._superseded()
+            if time.monotonic() > deadline:
+                self._timed_out(timeout)
+
+    def _timed_out(self, timeout):
+        self.timeouts += 1
+        metrics.increment("llm_timeouts")
+        raise LLMTimeoutError(f"No response within {timeout:.1f} s")
+
+    def _superseded(self):
+        metrics.increment("llm_superseded")
+        raise SupersededError()
+
+    def _create(self, prompt, stream=False):
+        return self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=stream
+        )
+
+    def complete(self, prompt, channel=None, timeout=None):
+        # A newer request on the same channel cancels this one, e.g. a second voice query
+        # replaces the first instead of both answers being spoken.
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        request = self._begin(channel)
+        start = time.perf_counter()
+        try:
+            self._acquire(request, deadline, timeout)
+            try:
+                request.attach(run_in_thread(self._create, prompt))
+                if not request.done.wait(max(deadline - time.monotonic(), 0)):
+                    request.future.cancel()
+                    self._timed_out(timeout)
+            finally:
+                self._slots.release()
+            if request.superseded:
+                self._superseded()
+            try:
+                response = request.future.result()
+            except Exception as e:
+                if is_provider_error(e):
+                    raise LLMProviderError(str(e)) from e
+                raise
+            metrics.observe("llm_request", time.perf_counter() - start)
+            return response.choices[0].message.content
+        finally:
+            self._finish(channel, request)
+
+    def stream_sentences(self, prompt, channel=None, timeout=None):
+        # Yields the response one sentence at a time as chunks arrive. The deadline covers the whole response.
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        request = self._begin(channel)
+        chunks = queue.Queue()
+
+        def produce():
+            try:
+                for chunk in self._create(prompt, stream=True):
+                    if request.superseded:
+                        return
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        chunks.put(content)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(None)
+
+        try:
+            self._acquire(request, deadline, timeout)
+            try:
+                request.attach(run_in_thread(produce))
+                buffer = ""
+                while True:
+                    # Short waits, so supersession is noticed at once even if produce never got to run
+                    try:
+                        content = chunks.get(timeout=POLL_INTERVAL)
+                    except queue.Empty:
+                        if request.superseded:
+                            self._superseded()
+                        if time.monotonic() > deadline:
+                            request.supersede()
+                            self._timed_out(timeout)
+                        continue
+                    if request.superseded:
+                        self._superseded()
+                    if content is None:
+                        break
+                    if isinstance(content, Exception):
+                        if is_provider_error(content):
+                            raise LLMProviderError(str(content)) from content
+                        raise content
+                    buffer += content
+                    *sentences, buffer = SENTENCE_END.split(buffer)
+                    for sentence in sentences:
+                        yield sentence
+                if buffer.strip():
+                    yield buffer.strip()
+            finally:
+                self._slots.release()
+        finally:
+            self._finish(channel, request)
+
+    def close(self):
+        # Stop waiting on everything in flight; used when the shared client is replaced
+        with self._lock:
+            for request in self._in_flight.values():
+                request.supersede()
+            self._in_flight.clear()
+
+
+class StubClient:
+    # Offline stand-in with the same shape as g4f's Client, for exercising pooling, deadlines and
+    # streaming without a network: LLMClient(client_factory=StubClient)
+    def __init__(self, response="This is a stub response. It has two sentences.", delay=0.0):
+        self.response = response
+        self.delay = delay
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, stream=False):
+        self.calls += 1
+        if not stream:
+            time.sleep(self.delay)
+            message = SimpleNamespace(content=self.response)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return self._stream()
+
+    def _stream(self):
+        words = self.response.split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.delay / len(words))
+            delta = SimpleNamespace(content=word if i == 0 else " " + word)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_client():
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = LLMClient()
+    return _shared
+
+
+def configure(**kwargs):
+    # Replace the shared client, e.g. configure(timeout=10) or configure(client_factory=StubClient)
+    global _shared
+    with _shared_lock:
+        if _shared is not None:
+            _shared.close()
+        _shared = LLMClient(**kwargs)
+    return _shared
@@ -65,3 +65,7 @@ class LoginScreen(Screen):
 
     def go_to_home(self, instance):
         self.manager.current = 'home'
+
+    def on_wake_word(self):
+        # Voice commands are not available while typing credentials
+        pass
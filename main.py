@@ -1,19 +1,22 @@
 
 import cv2
 import argparse
-from ultralytics import YOLO
 import numpy as np
-from g4f.client import Client
-import os
-from gtts import gTTS
-from g4f.errors import RetryProviderError
-import sounddevice as sd
-import speech_recognition as sr
-import io
 import time
-from gtts import gTTS
-from pydub import AudioSegment
-from pydub.playback import play
+from pipeline import FramePipeline
+from frame_sources import open_source
+import metrics
+from narration import NarrationWorker
+from tracking import DetectionScheduler, TrackedDetector
+from scene_state import SceneState
+from scene_cache import SceneDescriptionCache, scene_signature
+from scene_context import ConversationHistory, PromptMeter, serialize_scene
+from speech import configure as configure_speech, get_speech_service, speak_streamed
+from tts_backends import BACKENDS as TTS_BACKENDS
+from speech_input import NoSpeechError, RecognitionError, get_voice_input, speech_input_started
+from audio_output import PRIORITY_NARRATION, PRIORITY_RESPONSE, get_audio_output
+from llm_client import LLMProviderError, LLMTimeoutError, SupersededError, configure as configure_llm, get_llm_client
+from model_backends import BACKENDS, DEFAULT_CACHE_DIR, PRECISIONS, VARIANTS, load_model, variant_weights
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -24,15 +27,164 @@ def parse_arguments() -> argparse.Namespace:
         nargs=2,
         type=int
     )
+    parser.add_argument(
+        "--source",
+        default=None,
+        help="Camera index, video file, image or directory of images (default: camera 0)"
+    )
     parser.add_argument(
         "--horizontal-fov",
         default=70.0,
         type=float,
         help="Horizontal field of view of the webcam in degrees"
     )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Run capture, inference and rendering on separate threads"
+    )
+    parser.add_argument(
+        "--queue-size",
+        default=1,
+        type=int,
+        help="Maximum frames buffered between pipeline stages before the oldest is dropped"
+    )
+    parser.add_argument(
+        "--color-sample-scale",
+        default=1.0,
+        type=float,
+        help="Downscale factor of the frame copy used to sample object colours"
+    )
+    parser.add_argument(
+        "--backend",
+        default="torch",
+        choices=BACKENDS,
+        help="Inference backend; onnx and openvino models are exported once and cached"
+    )
+    parser.add_argument(
+        "--model-cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="Directory holding exported onnx/openvino models"
+    )
+    parser.add_argument(
+        "--model",
+        default="l",
+        choices=VARIANTS,
+        help="YOLOv8 model size"
+    )
+    parser.add_argument(
+        "--imgsz",
+        default=640,
+        type=int,
+        help="Inference image size"
+    )
+    parser.add_argument(
+        "--conf",
+        default=None,
+        type=float,
+        help="Detection confidence threshold"
+    )
+    parser.add_argument(
+        "--iou",
+        default=None,
+        type=float,
+        help="NMS IoU threshold"
+    )
+    parser.add_argument(
+        "--precision",
+        default="fp32",
+        choices=PRECISIONS,
+        help="Model precision; int8 needs the onnx or openvino backend"
+    )
+    parser.add_argument(
+        "--detect-every",
+        default=1,
+        type=int,
+        help="Run the detector every N frames and track boxes in between"
+    )
+    parser.add_argument(
+        "--adaptive-skip",
+        action="store_true",
+        help="Adapt the detection interval to the measured inference time"
+    )
+    parser.add_argument(
+        "--motion-threshold",
+        default=None,
+        type=float,
+        help="Also run the detector when the mean frame difference exceeds this value (0-255)"
+    )
+    parser.add_argument(
+        "--narration-mode",
+        default="full",
+        choices=["full", "changes"],
+        help="Narrate the whole scene every time, or only what appeared, disappeared or moved"
+    )
+    parser.add_argument(
+        "--scene-cache-ttl",
+        default=120.0,
+        type=float,
+        help="Seconds a generated scene description can be reused for an identical scene"
+    )
+    parser.add_argument(
+        "--scene-cache-db",
+        default=None,
+        help="SQLite file that keeps scene descriptions across restarts"
+    )
+    parser.add_argument(
+        "--llm-timeout",
+        default=20.0,
+        type=float,
+        help="Seconds to wait for a language model response before giving up"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        default=None,
+        type=int,
+        help="Serve Prometheus-style metrics on this local port (/metrics, /metrics.json)"
+    )
+    parser.add_argument(
+        "--metrics-jsonl",
+        default=None,
+        help="Append a metrics snapshot to this JSON Lines file every --metrics-interval seconds"
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        default=10.0,
+        type=float,
+        help="Seconds between JSON Lines metrics snapshots"
+    )
+    parser.add_argument(
+        "--overlay",
+        action="store_true",
+        help="Draw FPS and stage latencies on the video window"
+    )
+    parser.add_argument(
+        "--tts-backend",
+        default=None,
+        choices=list(TTS_BACKENDS),
+        help="Speech synthesis backend (default: $VISUAI_TTS_BACKEND or gtts)"
+    )
     args = parser.parse_args()
     return args
 
+def compute_integral_image(frame, scale=1.0):
+    # Summed-area table of the clean frame, optionally on a downscaled copy to save memory bandwidth
+    if scale != 1.0:
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return cv2.integral(frame, sdepth=cv2.CV_64F)
+
+def get_object_colors(integral, bboxes, scale=1.0):
+    # Mean BGR of every box in O(1) per box from the summed-area table
+    height, width = integral.shape[0] - 1, integral.shape[1] - 1
+    corners = (bboxes * scale).astype(int)
+    x1 = np.clip(corners[:, 0], 0, width)
+    y1 = np.clip(corners[:, 1], 0, height)
+    x2 = np.clip(corners[:, 2], 0, width)
+    y2 = np.clip(corners[:, 3], 0, height)
+    sums = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+    areas = ((x2 - x1) * (y2 - y1)).reshape(-1, 1)
+    return np.divide(sums, areas, out=np.zeros_like(sums), where=areas > 0)
+
 def get_object_color(frame, bbox):
     x1, y1, x2, y2 = bbox
     object_region = frame[int(y1):int(y2), int(x1):int(x2)]
@@ -82,40 +234,94 @@ def size_description(width, height, frame_width, frame_height):
     else:
         return "large"
 
-def draw_boxes(frame, results, model, h_fov, frame_width, frame_height):
+SIZE_LABELS = np.array(["small", "medium", "large"])
+SIZE_THRESHOLDS = [0.05, 0.2]
+
+def boxes_to_arrays(result):
+    # One host transfer per result. Columns are x1, y1, x2, y2, [track id], confidence, class.
+    data = result.boxes.data
+    if hasattr(data, "cpu"):
+        data = data.cpu().numpy()
+    xyxy = data[:, :4]
+    confidences = data[:, -2]
+    class_ids = data[:, -1].astype(int)
+    track_ids = data[:, 4].astype(int) if data.shape[1] == 7 else None
+    return xyxy, confidences, class_ids, track_ids
+
+def size_descriptions(areas, frame_width, frame_height):
+    size_ratios = areas / (frame_width * frame_height)
+    return SIZE_LABELS[np.searchsorted(SIZE_THRESHOLDS, size_ratios, side="right")]
+
+def describe_positions(centers_x, centers_y, frame_width, frame_height):
+    horizontal = np.where(centers_x < frame_width / 3, "left",
+                          np.where(centers_x > 2 * frame_width / 3, "right", "center"))
+    vertical = np.where(centers_y < frame_height / 3, "top",
+                        np.where(centers_y > 2 * frame_height / 3, "bottom", "center"))
+    return np.char.add(np.char.add(vertical, " "), horizontal)
+
+def describe_geometry(xyxy, h_fov, frame_width, frame_height):
+    # Vectorized counterparts of size_description, calculate_angle and describe_position for N boxes
+    # Sums stay in the detector's float32 and are widened before dividing, matching the per-box scalar maths
+    widths = xyxy[:, 2] - xyxy[:, 0]
+    heights = xyxy[:, 3] - xyxy[:, 1]
+    areas = (widths * heights).astype(np.float64)
+    centers_x = (xyxy[:, 0] + xyxy[:, 2]).astype(np.float64) / 2
+    centers_y = (xyxy[:, 1] + xyxy[:, 3]).astype(np.float64) / 2
+    return {
+        "sizes": size_descriptions(areas, frame_width, frame_height),
+        "h_angles": calculate_angle(centers_x, h_fov, frame_width),
+        "v_angles": calculate_angle(centers_y, h_fov * (frame_height / frame_width), frame_height),
+        "directions": describe_positions(centers_x, centers_y, frame_width, frame_height),
+    }
+
+@metrics.timer("draw_boxes")
+def annotate_frame(frame, results, model, h_fov, frame_width, frame_height, color_scale=1.0):
+    # draw_boxes plus a structured record per object for the tracking and narration layers
     object_descriptions = []
+    objects = []
     class_counts = {}
+    integral = None
 
     for result in results:
-        if result.boxes.xyxy.shape[0] == 0:
+        xyxy, confidences, class_ids, track_ids = boxes_to_arrays(result)
+        if xyxy.shape[0] == 0:
             continue
 
-        for i in range(result.boxes.xyxy.shape[0]):
-            bbox = result.boxes.xyxy[i].cpu().numpy()
-            confidence = result.boxes.conf[i].cpu().numpy()
-            class_id = result.boxes.cls[i].cpu().numpy()
-            class_name = model.names[int(class_id)]
+        geometry = describe_geometry(xyxy, h_fov, frame_width, frame_height)
+        if integral is None:
+            # Built once per frame before anything is drawn, so colours come from the camera image, not the overlay
+            integral = compute_integral_image(frame, color_scale)
+        mean_colors = get_object_colors(integral, xyxy, color_scale)
+        corners = xyxy.astype(int).tolist()
+
+        for i in range(xyxy.shape[0]):
+            class_name = model.names[class_ids[i]]
+            x1, y1, x2, y2 = corners[i]
 
             color = (0, 255, 0) if class_name != "mouse" else (255, 0, 0)
-            cv2.rectangle(frame, (int(bbox[0]), int(bbox[1])), (int(bbox[2]), int(bbox[3])), color, 2)
-            label = f"{class_name} {confidence:.2f}"
-            cv2.putText(frame, label, (int(bbox[0]), int(bbox[1]) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-
-            mean_color = get_object_color(frame, bbox)
-            color_description = color_to_description(mean_color)
-            object_width = bbox[2] - bbox[0]
-            object_height = bbox[3] - bbox[1]
-            size_desc = size_description(object_width, object_height, frame_width, frame_height)
-            center_x = (bbox[0] + bbox[2]) / 2
-            center_y = (bbox[1] + bbox[3]) / 2
-            h_angle = calculate_angle(center_x, h_fov, frame_width)
-            v_angle = calculate_angle(center_y, h_fov * (frame_height / frame_width), frame_height)
-
-            direction = describe_position(center_x, center_y, frame_width, frame_height)
-            description = (f"I see a {size_desc} {class_name} at the {direction}. "
-                           f"The color of the object is {color_description}. It is positioned at an angle of {h_angle:.2f} degrees horizontally and "
-                           f"{v_angle:.2f} degrees vertically.")
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            label = f"{class_name} {confidences[i]:.2f}"
+            if track_ids is not None:
+                label = f"{class_name} #{track_ids[i]} {confidences[i]:.2f}"
+            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+            color_description = color_to_description(mean_colors[i])
+            description = (f"I see a {geometry['sizes'][i]} {class_name} at the {geometry['directions'][i]}. "
+                           f"The color of the object is {color_description}. It is positioned at an angle of {geometry['h_angles'][i]:.2f} degrees horizontally and "
+                           f"{geometry['v_angles'][i]:.2f} degrees vertically.")
             object_descriptions.append(description)
+            objects.append({
+                "class_name": class_name,
+                "confidence": float(confidences[i]),
+                "track_id": int(track_ids[i]) if track_ids is not None else None,
+                "bbox": xyxy[i],
+                "size": str(geometry["sizes"][i]),
+                "direction": str(geometry["directions"][i]),
+                "color": color_description,
+                "h_angle": float(geometry["h_angles"][i]),
+                "v_angle": float(geometry["v_angles"][i]),
+                "description": description,
+            })
 
             if class_name in class_counts:
                 class_counts[class_name] += 1
@@ -123,129 +329,245 @@ def draw_boxes(frame, results, model, h_fov, frame_width, frame_height):
                 class_counts[class_name] = 1
 
     scene_summary = "Here's what I see: " + ", ".join([f"{count} {name}(s)" for name, count in class_counts.items()])
+    return object_descriptions, scene_summary, objects
+
+def draw_boxes(frame, results, model, h_fov, frame_width, frame_height, color_scale=1.0):
+    object_descriptions, scene_summary, _ = annotate_frame(frame, results, model, h_fov, frame_width, frame_height, color_scale)
     return object_descriptions, scene_summary
 
-def generate_scene_description(object_descriptions, scene_summary):
-    client = Client()
+# Shared by every caller of generate_scene_description; main() may replace it with a persistent one
+scene_cache = SceneDescriptionCache()
+
+@metrics.timer("scene_description")
+def generate_scene_description(object_descriptions, scene_summary, cache=None):
+    cache = cache or scene_cache
+    signature = scene_signature(object_descriptions, scene_summary)
+    cached_description = cache.get(signature)
+    if cached_description is not None:
+        return cached_description
+
     scene_description_prompt = (f"Based on the detected objects, here is a summary of the scene:\n"
                                 f"{scene_summary}\n"
                                 f"Detailed descriptions of the objects:\n" + "\n".join(object_descriptions) + "\n"
                                 f" You are a helpful assistant that will take the summary of the scene and output a brief but descriptive response. I am a blind person that needs to know the basics of the environment and what the current scene entails. Please describe the scene in a natural, brief, but all encapsulating manner.")
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": scene_description_prompt}]
-        )
-        return response.choices[0].message.content
-    except RetryProviderError as e:
+        scene_description = get_llm_client().complete(scene_description_prompt, channel="scene")
+        cache.put(signature, scene_description)
+        return scene_description
+    except SupersededError:
+        return None
+    except (LLMProviderError, LLMTimeoutError) as e:
         return "I'm currently unable to provide a detailed scene description. Please try again later."
 
-def generate_user_query_response(user_query):
-    client = Client()
-    query_prompt = (f"The user has asked: {user_query}\n"
-                    f"Based on the context of the environment and scene, provide a clear and concise response to the user's query.")
+def generate_scene_update(change_descriptions, scene_summary):
+    scene_update_prompt = (f"The scene was described to me a few seconds ago. Since then, these things changed:\n"
+                           + "\n".join(change_descriptions) + "\n"
+                           f"The scene now contains: {scene_summary}\n"
+                           f" You are a helpful assistant for a blind person. Briefly tell me only what changed, in a natural manner, without describing the rest of the scene again.")
+    try:
+        return get_llm_client().complete(scene_update_prompt, channel="scene")
+    except SupersededError:
+        return None
+    except (LLMProviderError, LLMTimeoutError) as e:
+        return "I'm currently unable to provide a scene update. Please try again later."
+
+# Recent questions and answers, so follow-ups like "and on my right?" have something to refer to
+query_history = ConversationHistory()
+query_prompt_meter = PromptMeter()
+
+def build_user_query_prompt(user_query, objects=None, scene_tokens=150):
+    # objects are annotate_frame's records for the latest frame, serialized to a bounded size
+    scene = serialize_scene(objects or [], scene_tokens)
+    history = query_history.render()
+    prompt = ("I am a blind person using a camera that detects objects. Current scene "
+              "(object xcount: position, horizontal angle from center, negative is left):\n"
+              f"{scene}\n")
+    if history:
+        prompt += f"Earlier in this conversation:\n{history}\n"
+    prompt += (f"The user has asked: {user_query}\n"
+               f"Based on the context of the environment and scene, provide a clear and concise response to the user's query.")
+    query_prompt_meter.record(prompt)
+    return prompt
+
+def generate_user_query_response(user_query, objects=None):
+    # Returns None when a newer query replaced this one before it was answered
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": query_prompt}]
-        )
-        return response.choices[0].message.content
-    except RetryProviderError as e:
+        response = get_llm_client().complete(build_user_query_prompt(user_query, objects), channel="query")
+        query_history.add(user_query, response)
+        return response
+    except SupersededError:
+        return None
+    except (LLMProviderError, LLMTimeoutError) as e:
         return "I'm currently unable to process your query. Please try again later."
 
-def speak_text(text, speed=1.5):  # speed is a multiplier, 1.0 is normal speed
+def stream_user_query_response(user_query, objects=None):
+    # Same as generate_user_query_response, but yields sentences as soon as they arrive
+    sentences = []
     try:
-        tts = gTTS(text, lang='en')
-        audio_path = "output.mp3"
-        tts.save(audio_path)
-        
-        # Check if file is created
-        if not os.path.exists(audio_path):
-            print("Error: Audio file was not created.")
-            return
-
-        # Load the audio file
-        audio = AudioSegment.from_mp3(audio_path)
-        
-        # Adjust the speed
-        new_sample_rate = int(audio.frame_rate * speed)
-        slowed_audio = audio._spawn(audio.raw_data, overrides={'frame_rate': new_sample_rate})
-        slowed_audio = slowed_audio.set_frame_rate(audio.frame_rate)
-        
-        # Play the audio
-        play(slowed_audio)
-
+        for sentence in get_llm_client().stream_sentences(build_user_query_prompt(user_query, objects), channel="query"):
+            sentences.append(sentence)
+            yield sentence
+        query_history.add(user_query, " ".join(sentences))
+    except SupersededError:
+        return
+    except (LLMProviderError, LLMTimeoutError) as e:
+        yield "I'm currently unable to process your query. Please try again later."
+
+def speak_text(text, speed=1.5, priority=PRIORITY_RESPONSE, tag=None, wait=False):  # speed is a multiplier, 1.0 is normal speed
+    # text may also be an iterable of sentences, e.g. stream_user_query_response(...).
+    # Playback is queued on the shared audio output; returns the utterance ID, or None on failure.
+    try:
+        return speak_streamed(text, speed, priority=priority, tag=tag, wait=wait)
     except Exception as e:
         print(f"An error occurred during text-to-speech: {e}")
 
-    except Exception as e:
-        print(f"An error occurred during text-to-speech: {e}")
+def speak_narration(text):
+    # A newer narration replaces a queued older one, and any user feedback cuts it off
+    return speak_text(text, priority=PRIORITY_NARRATION, tag="narration")
 
 def record_audio(duration=5):
-    recognizer = sr.Recognizer()
-    audio_data = None
-
-    def callback(indata, frames, time, status):
-        nonlocal audio_data
-        audio_data = indata.tobytes()
-
-    with sd.InputStream(samplerate=16000, channels=1, callback=callback):
-        print("Listening...")
-        sd.sleep(duration * 1000)
-
-    if audio_data:
-        audio_file = io.BytesIO(audio_data)
-        with sr.AudioFile(audio_file) as source:
-            audio = recognizer.record(source)
-            try:
-                return recognizer.recognize_google(audio)
-            except sr.UnknownValueError:
-                return "Sorry, I didn't catch that."
-            except sr.RequestError:
-                return "Sorry, I'm having trouble with the speech recognition service."
-
-    return "No audio detected."
-
-def initialize_camera(frame_width, frame_height):
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_width)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_height)
-    return cap
-
-def load_yolo_model():
-    return YOLO("yolov8l.pt")
+    print("Listening...")
+    try:
+        return get_voice_input().listen(timeout=duration).text
+    except NoSpeechError:
+        return "Sorry, I didn't catch that."
+    except RecognitionError:
+        return "Sorry, I'm having trouble with the speech recognition service."
+
+def initialize_camera(frame_width, frame_height, source=None):
+    # Recorded sources are resized to frame_width x frame_height so positions and angles stay comparable
+    return open_source(source, frame_width, frame_height)
+
+def load_yolo_model(variant="l", backend="torch", imgsz=640, cache_dir=DEFAULT_CACHE_DIR,
+                    precision="fp32", conf=None, iou=None):
+    return load_model(variant_weights(variant), backend, imgsz, cache_dir, precision, conf, iou)
+
+def schedule_narration(narrator, scene_state, object_descriptions, scene_summary, narration_mode="full"):
+    # In "changes" mode only the diff since the last narration is sent, and nothing at all when
+    # the scene is unchanged. Returns whether a narration was submitted. The scene only counts as
+    # reported once a narration built from it was delivered, so changes in a dropped one are diffed again.
+    snapshot = scene_state.visible()
+    on_narrated = lambda: scene_state.mark_reported(snapshot)
+    if narration_mode == "changes" and scene_state.has_baseline():
+        changes = scene_state.changes()
+        if not changes:
+            return False
+        narrator.submit(changes.sentences(), scene_summary, generate_scene_update, on_narrated)
+    else:
+        narrator.submit(object_descriptions, scene_summary, on_narrated=on_narrated)
+    return True
+
+def run_pipeline(cap, model, narrator, scene_state, h_fov, frame_width, frame_height, queue_size=1, color_scale=1.0,
+                 narration_mode="full", overlay=False):
+    last_update_time = time.time()
+    last_stats_time = time.time()
+
+    def render(packet):
+        nonlocal last_update_time
+        if not packet.results:
+            return
+        object_descriptions, scene_summary, objects = annotate_frame(packet.frame, packet.results, model, h_fov,
+                                                                     frame_width, frame_height, color_scale)
+        scene_state.update(objects)
+
+        if time.time() - last_update_time > 8:
+            schedule_narration(narrator, scene_state, object_descriptions, scene_summary, narration_mode)
+            last_update_time = time.time()
+
+    pipeline = FramePipeline(cap, model, render, queue_size=queue_size)
+    pipeline.start()
+
+    # HighGUI windows must be driven from the main thread, so only the display happens here
+    while pipeline.running():
+        packet = pipeline.latest(timeout=0.1)
+        if packet is not None:
+            if overlay:
+                metrics.draw_overlay(packet.frame)
+            cv2.imshow("YOLOv8 Detection", packet.frame)
+
+        if time.time() - last_stats_time > 5:
+            print(pipeline.format_stats())
+            last_stats_time = time.time()
+
+        key = cv2.waitKey(1)
+        if key == 27:  # Esc key to exit
+            break
+
+    pipeline.stop()
+
+def print_session_stats():
+    print(f"Scene description cache: {scene_cache.stats()}")
+    print(f"Speech synthesis latency: {get_speech_service().latency_report()}")
+    print(f"Query prompt size: {query_prompt_meter.report()}")
+    print(f"Audio output: {get_audio_output().stats()}")
+    if speech_input_started():
+        print(f"Speech recognition latency: {get_voice_input().latency_report()}")
 
 def main():
+    global scene_cache
     args = parse_arguments()
+    scene_cache = SceneDescriptionCache(ttl=args.scene_cache_ttl, db_path=args.scene_cache_db)
+    configure_llm(timeout=args.llm_timeout)
+    configure_speech(args.tts_backend)
+    _, metrics_dumper = metrics.configure(args.metrics_port, args.metrics_jsonl, args.metrics_interval)
     frame_width, frame_height = args.webcam_resolution
     h_fov = args.horizontal_fov
 
-    cap = initialize_camera(frame_width, frame_height)
-    model = load_yolo_model()
+    cap = initialize_camera(frame_width, frame_height, args.source)
+    model = load_yolo_model(args.model, args.backend, args.imgsz, args.model_cache_dir,
+                            args.precision, args.conf, args.iou)
+    if args.detect_every > 1 or args.adaptive_skip or args.motion_threshold is not None:
+        scheduler = DetectionScheduler(args.detect_every, args.adaptive_skip, motion_threshold=args.motion_threshold)
+        model = TrackedDetector(model, scheduler)
+    # Narration runs in the background so the video loop keeps its frame rate while speaking
+    narrator = NarrationWorker(generate_scene_description, speak_narration)
+    scene_state = SceneState(frame_width, frame_height)
+
+    if args.pipeline:
+        run_pipeline(cap, model, narrator, scene_state, h_fov, frame_width, frame_height, args.queue_size,
+                     args.color_sample_scale, args.narration_mode, args.overlay)
+        narrator.stop()
+        print_session_stats()
+        if metrics_dumper:
+            metrics_dumper.stop()
+        cap.release()
+        cv2.destroyAllWindows()
+        return
 
     last_update_time = time.time()
 
     while True:
-        ret, frame = cap.read()
+        frame_start = time.perf_counter()
+        with metrics.timer("capture"):
+            ret, frame = cap.read()
         if not ret:
             break
 
-        results = model(frame, agnostic_nms=True)
+        with metrics.timer("inference"):
+            results = model(frame, agnostic_nms=True)
 
         if results:
-            object_descriptions, scene_summary = draw_boxes(frame, results, model, h_fov, frame_width, frame_height)
+            object_descriptions, scene_summary, objects = annotate_frame(frame, results, model, h_fov, frame_width,
+                                                                         frame_height, args.color_sample_scale)
+            scene_state.update(objects)
 
             if time.time() - last_update_time > 8:
-                scene_description = generate_scene_description(object_descriptions, scene_summary)
-                speak_text(scene_description)
+                schedule_narration(narrator, scene_state, object_descriptions, scene_summary, args.narration_mode)
                 last_update_time = time.time()
 
+            metrics.observe("frame_latency", time.perf_counter() - frame_start)
+            if args.overlay:
+                metrics.draw_overlay(frame)
             cv2.imshow("YOLOv8 Detection", frame)
 
         key = cv2.waitKey(1)
         if key == 27:  # Esc key to exit
             break
 
+    narrator.stop()
+    print_session_stats()
+    if metrics_dumper:
+        metrics_dumper.stop()
     cap.release()
     cv2.destroyAllWindows()
 
@@ -0,0 +1,228 @@
+import functools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+PREFIX = "visuai"
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    # Durations in seconds in a fixed ring of the most recent observations, plus lifetime count
+    # and sum. observe() is a couple of array stores, cheap enough for every frame.
+    def __init__(self, window=1024):
+        self.count = 0
+        self.sum = 0.0
+        self._values = np.zeros(window)
+        self._stamps = np.zeros(window)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            slot = self.count % len(self._values)
+            self._values[slot] = value
+            self._stamps[slot] = time.perf_counter()
+            self.count += 1
+            self.sum += value
+
+    def recent(self):
+        with self._lock:
+            n = min(self.count, len(self._values))
+            return self._values[:n].copy(), self._stamps[:n].copy()
+
+    def rate(self):
+        # Observations per second over the window, e.g. frames per second for a per-frame timer
+        _, stamps = self.recent()
+        if stamps.size < 2:
+            return 0.0
+        elapsed = stamps.max() - stamps.min()
+        return (stamps.size - 1) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        values, _ = self.recent()
+        summary = {"count": self.count, "sum": self.sum, "rate": self.rate()}
+        if values.size:
+            summary["mean"] = float(values.mean())
+            for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                summary[f"p{int(q * 100)}"] = float(value)
+        return summary
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def increment(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class MetricsRegistry:
+    def __init__(self, window=1024):
+        self.window = window
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram(self.window))
+        return histogram
+
+    def counter(self, name):
+        counter = self.counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self.counters.setdefault(name, Counter())
+        return counter
+
+    def snapshot(self):
+        return {
+            "timestamp": time.time(),
+            "timers": {name: h.summary() for name, h in list(self.histograms.items())},
+            "counters": {name: c.value for name, c in list(self.counters.items())},
+        }
+
+    def prometheus_text(self):
+        # Timers become summaries over the recent window; counters become *_total
+        lines = []
+        for name, histogram in sorted(self.histograms.items()):
+            metric = f"{PREFIX}_{name}_seconds"
+            summary = histogram.summary()
+            lines.append(f"# TYPE {metric} summary")
+            for q in QUANTILES:
+                key = f"p{int(q * 100)}"
+                if key in summary:
+                    lines.append(f'{metric}{{quantile="{q}"}} {summary[key]:.6f}')
+            lines.append(f"{metric}_sum {summary['sum']:.6f}")
+            lines.append(f"{metric}_count {summary['count']}")
+        for name, counter in sorted(self.counters.items()):
+            metric = f"{PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {counter.value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def observe(name, seconds):
+    registry.histogram(name).observe(seconds)
+
+
+def increment(name, amount=1):
+    registry.counter(name).increment(amount)
+
+
+class Timer:
+    # Context manager and decorator that records elapsed seconds into a histogram
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self._start)
+
+    def __call__(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.histogram.observe(time.perf_counter() - start)
+        return wrapper
+
+
+def timer(name):
+    # with timer("inference"): ...  or  @timer("draw_boxes") on a function
+    return Timer(registry.histogram(name))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = registry.prometheus_text(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(registry.snapshot()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would otherwise flood the console
+        pass
+
+
+def start_http_server(port=9464, host="127.0.0.1"):
+    # Prometheus text at /metrics, the same data as JSON at /metrics.json
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+
+class JsonlDumper:
+    # Appends one snapshot per interval to a JSON Lines file, for devices nothing can scrape
+    def __init__(self, path, interval=10.0):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        threading.Thread(target=self._run, name="metrics-jsonl", daemon=True).start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(registry.snapshot()) + "\n")
+
+    def stop(self):
+        self._stop.set()
+        self.dump()
+
+
+def configure(port=None, jsonl_path=None, interval=10.0):
+    # Start whichever exporters were asked for; returns them so callers can stop the dumper
+    server = start_http_server(port) if port else None
+    dumper = JsonlDumper(jsonl_path, interval) if jsonl_path else None
+    return server, dumper
+
+
+def overlay_lines():
+    frames = registry.histogram("frame_latency")
+    lines = [f"{frames.rate():.1f} FPS"]
+    for name, label in (("frame_latency", "latency"), ("inference", "infer"), ("draw_boxes", "draw")):
+        summary = registry.histogram(name).summary()
+        if "p50" in summary:
+            lines.append(f"{label} {summary['p50'] * 1000:.0f} / {summary['p95'] * 1000:.0f} ms")
+    return lines
+
+
+def draw_overlay(frame, lines=None):
+    # Small text block in the top-left corner, p50 / p95 for each stage
+    # cv2 is only needed here, so the audio and LLM modules can record metrics without importing it
+    import cv2
+
+    lines = lines if lines is not None else overlay_lines()
+    for i, line in enumerate(lines):
+        y = 24 + i * 22
+        cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 4)
+        cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+    return frame
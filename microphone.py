@@ -0,0 +1,198 @@
+import json
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+BLOCK_MS = 30
+BLOCK_SIZE = SAMPLE_RATE * BLOCK_MS // 1000
+
+
+class RingBuffer:
+    # Fixed-size int16 ring with one writer and any number of readers. The writer copies the
+    # samples in before publishing the new total, and every reader keeps its own absolute
+    # position, so neither side ever takes a lock.
+    def __init__(self, seconds=10.0, sample_rate=SAMPLE_RATE):
+        self.capacity = int(seconds * sample_rate)
+        self.written = 0
+        self._data = np.zeros(self.capacity, dtype=np.int16)
+
+    def write(self, samples):
+        total = len(samples)
+        samples = samples[-self.capacity:]
+        start = (self.written + total - len(samples)) % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:len(samples) - first] = samples[first:]
+        self.written += total
+
+    def read(self, position, count):
+        # Returns (samples, next position). Readers that fell more than a buffer behind skip ahead.
+        position = max(position, self.written - self.capacity)
+        count = min(count, self.written - position)
+        start = position % self.capacity
+        first = min(count, self.capacity - start)
+        samples = np.concatenate([self._data[start:start + first], self._data[:count - first]])
+        return samples, position + count
+
+
+class MicReader:
+    # One consumer's cursor into the shared capture
+    def __init__(self, ring, position, source=None):
+        self.ring = ring
+        self.position = position
+        self.source = source
+
+    @property
+    def ended(self):
+        # The source stopped producing (e.g. a replayed file ran out) and everything it wrote has been read
+        return (self.source is not None and self.source.ended
+                and self.ring.written - self.position < BLOCK_SIZE)
+
+    def read_block(self, block_size=BLOCK_SIZE, timeout=1.0):
+        # Returns None when no full block arrived within timeout, or at once when the source has ended
+        deadline = time.perf_counter() + timeout
+        while self.ring.written - self.position < block_size:
+            if time.perf_counter() > deadline or self.ended:
+                return None
+            time.sleep(BLOCK_MS / 3000)
+        samples, self.position = self.ring.read(self.position, block_size)
+        return samples.tobytes()
+
+
+class MicrophoneService:
+    # One long-lived 16 kHz mono input stream feeding a ring buffer. Consumers (speech input,
+    # wake word) attach with reader() instead of opening the device themselves, so there is no
+    # device open latency per press and a few hundred ms of pre-roll are always available.
+    def __init__(self, seconds=10.0):
+        self.ring = RingBuffer(seconds)
+        self.ended = False
+        self._stream = None
+
+    def start(self):
+        import sounddevice as sd
+
+        self._stream = sd.RawInputStream(samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, channels=1,
+                                         dtype="int16", callback=self._on_audio)
+        self._stream.start()
+        return self
+
+    def _on_audio(self, indata, frames, time_info, status):
+        self.ring.write(np.frombuffer(indata, dtype=np.int16))
+
+    def reader(self, preroll_ms=0):
+        preroll = SAMPLE_RATE * preroll_ms // 1000
+        return MicReader(self.ring, max(self.ring.written - preroll, 0), self)
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+class WavFileSource(MicrophoneService):
+    # Replays a 16-bit WAV file in place of the microphone, at real time or as fast as it is read
+    def __init__(self, path, realtime=True, loop=False, seconds=10.0):
+        super(WavFileSource, self).__init__(seconds)
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self._running = False
+        self._thread = None
+
+    def _load(self):
+        with wave.open(self.path) as f:
+            samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+            if f.getnchannels() > 1:
+                samples = samples.reshape(-1, f.getnchannels()).mean(axis=1).astype(np.int16)
+            rate = f.getframerate()
+        if rate != SAMPLE_RATE:
+            positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+        return samples
+
+    def start(self):
+        samples = self._load()
+        self._running = True
+
+        def feed():
+            while self._running:
+                for start in range(0, len(samples), BLOCK_SIZE):
+                    if not self._running:
+                        break
+                    self.ring.write(samples[start:start + BLOCK_SIZE])
+                    if self.realtime:
+                        time.sleep(BLOCK_MS / 1000)
+                if not self.loop:
+                    break
+            self.ended = True
+
+        self._thread = threading.Thread(target=feed, name="wav-source", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+
+
+class WakeWordListener:
+    # Keyword spotting on its own reader: a Vosk recognizer restricted to the wake phrase, so it
+    # stays cheap enough to run all the time. Calls on_wake() each time the phrase is heard.
+    def __init__(self, microphone, phrase, on_wake, model_path=None):
+        from vosk import KaldiRecognizer, Model
+
+        model_path = model_path or os.environ.get("VISUAI_VOSK_MODEL")
+        if not model_path:
+            raise RuntimeError("Set VISUAI_VOSK_MODEL to a Vosk model directory to use a wake word")
+        self.phrase = phrase.lower()
+        self.on_wake = on_wake
+        self.reader = microphone.reader()
+        self._recognizer = KaldiRecognizer(Model(model_path), SAMPLE_RATE, json.dumps([self.phrase, "[unk]"]))
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="wake-word", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # A replayed file that has run out will never say the phrase
+        while self._running and not self.reader.ended:
+            pcm = self.reader.read_block()
+            if pcm is None:
+                continue
+            if self._recognizer.AcceptWaveform(pcm):
+                heard = json.loads(self._recognizer.Result()).get("text", "")
+            else:
+                heard = json.loads(self._recognizer.PartialResult()).get("partial", "")
+            if self.phrase in heard:
+                self._recognizer.Reset()
+                self.on_wake()
+
+    def stop(self):
+        self._running = False
+
+
+_microphone = None
+_microphone_lock = threading.RLock()
+
+
+def configure(wav_path=None, realtime=True):
+    # Use the default input device, or $VISUAI_MIC_WAV / wav_path to replay a file instead
+    global _microphone
+    wav_path = wav_path or os.environ.get("VISUAI_MIC_WAV")
+    with _microphone_lock:
+        if _microphone is not None:
+            _microphone.stop()
+        source = WavFileSource(wav_path, realtime) if wav_path else MicrophoneService()
+        _microphone = source.start()
+    return _microphone
+
+
+def get_microphone():
+    if _microphone is None:
+        with _microphone_lock:
+            if _microphone is None:
+                return configure()
+    return _microphone
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import shutil
+
+BACKENDS = ("torch", "onnx", "openvino")
+VARIANTS = ("n", "s", "m", "l", "x")
+PRECISIONS = ("fp32", "fp16", "int8")
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "visuai", "models")
+
+# Ultralytics export format name and the suffix of the artifact it produces
+EXPORT_FORMATS = {
+    "onnx": ("onnx", ".onnx"),
+    "openvino": ("openvino", "_openvino_model"),
+}
+
+
+class DetectorModel:
+    # Applies the configured inference size and thresholds to every call, so call sites can keep
+    # using model(frame, agnostic_nms=True). Everything else (names, predictor, ...) is forwarded.
+    def __init__(self, model, **predict_defaults):
+        self.model = model
+        self.predict_defaults = predict_defaults
+
+    def __call__(self, source, **kwargs):
+        return self.model(source, **{**self.predict_defaults, **kwargs})
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+def variant_weights(variant):
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown model variant '{variant}', expected one of {', '.join(VARIANTS)}")
+    return f"yolov8{variant}.pt"
+
+
+def weights_hash(weights_path):
+    digest = hashlib.sha256()
+    with open(weights_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def cached_artifact_path(cache_dir, weights_path, backend, imgsz, precision):
+    name = os.path.splitext(os.path.basename(weights_path))[0]
+    suffix = EXPORT_FORMATS[backend][1]
+    key = f"{name}-{weights_hash(weights_path)}-{imgsz}-{precision}-{backend}"
+    return os.path.join(cache_dir, key + suffix)
+
+
+def quantize_onnx(path):
+    # Ultralytics has no INT8 ONNX export, so weights are quantized after the fact
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized = path.replace(".onnx", "-int8.onnx")
+    quantize_dynamic(path, quantized, weight_type=QuantType.QUInt8)
+    return quantized
+
+
+def export_model(weights, backend, imgsz, precision, cache_dir):
+    # Export once and keep the converted model next to the others, keyed by weights hash,
+    # image size, precision and backend so later starts skip the conversion entirely.
+    from ultralytics import YOLO
+
+    model = YOLO(weights)
+    weights_path = weights if os.path.exists(weights) else model.ckpt_path
+    artifact = cached_artifact_path(cache_dir, weights_path, backend, imgsz, precision)
+    if os.path.exists(artifact):
+        return artifact
+
+    os.makedirs(cache_dir, exist_ok=True)
+    print(f"Exporting {weights} to {backend} (imgsz={imgsz}, {precision}), this only happens once...")
+    export_args = {"format": EXPORT_FORMATS[backend][0], "imgsz": imgsz}
+    if precision == "fp16":
+        export_args["half"] = True
+    elif precision == "int8" and backend == "openvino":
+        export_args["int8"] = True
+    exported = model.export(**export_args)
+    if precision == "int8" and backend == "onnx":
+        exported = quantize_onnx(exported)
+
+    # Move into place under a temporary name first so an interrupted export is never picked up
+    staging = artifact + ".tmp"
+    if os.path.isdir(exported):
+        shutil.copytree(exported, staging, dirs_exist_ok=True)
+    else:
+        shutil.copyfile(exported, staging)
+    os.replace(staging, artifact)
+    return artifact
+
+
+def load_model(weights="yolov8l.pt", backend="torch", imgsz=640, cache_dir=DEFAULT_CACHE_DIR,
+               precision="fp32", conf=None, iou=None):
+    # Ultralytics pulls in torch, which takes seconds to import, so it is only imported here
+    from ultralytics import YOLO
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {', '.join(PRECISIONS)}")
+
+    # Per-call timings come from the metrics module instead of Ultralytics' console line
+    predict_defaults = {"imgsz": imgsz, "verbose": False}
+    if conf is not None:
+        predict_defaults["conf"] = conf
+    if iou is not None:
+        predict_defaults["iou"] = iou
+
+    if backend == "torch":
+        if precision == "int8":
+            raise ValueError("INT8 precision needs the onnx or openvino backend")
+        if precision == "fp16":
+            # PyTorch only runs half precision on GPU; Ultralytics falls back to fp32 on CPU
+            predict_defaults["half"] = True
+        return DetectorModel(YOLO(weights), **predict_defaults)
+
+    if os.path.exists(weights):
+        artifact = cached_artifact_path(cache_dir, weights, backend, imgsz, precision)
+        if not os.path.exists(artifact):
+            artifact = export_model(weights, backend, imgsz, precision, cache_dir)
+    else:
+        artifact = export_model(weights, backend, imgsz, precision, cache_dir)
+    # Exported models do not carry the task in a way Ultralytics can always infer
+    return DetectorModel(YOLO(artifact, task="detect"), **predict_defaults)
@@ -0,0 +1,112 @@
+import argparse
+import glob
+import itertools
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from main import boxes_to_arrays
+from frame_sources import IMAGE_EXTENSIONS
+from tracking import box_iou, greedy_match
+from model_backends import BACKENDS, DEFAULT_CACHE_DIR, PRECISIONS, VARIANTS, load_model, variant_weights
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare model size, input size and precision on recorded frames")
+    parser.add_argument("frames", help="Directory of frames to run every configuration on")
+    parser.add_argument("--models", nargs="+", default=list(VARIANTS), choices=VARIANTS)
+    parser.add_argument("--imgsz", nargs="+", default=[640], type=int)
+    parser.add_argument("--backends", nargs="+", default=["torch"], choices=BACKENDS)
+    parser.add_argument("--precisions", nargs="+", default=["fp32"], choices=PRECISIONS)
+    parser.add_argument("--conf", default=None, type=float)
+    parser.add_argument("--iou", default=None, type=float)
+    parser.add_argument("--match-iou", default=0.5, type=float,
+                        help="IoU at which a detection counts as agreeing with the baseline")
+    parser.add_argument("--model-cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--json", default=None, help="Also write the report to this file")
+    return parser.parse_args()
+
+
+def load_frames(directory):
+    paths = sorted(p for p in glob.glob(os.path.join(directory, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+    if not paths:
+        raise SystemExit(f"No images found in {directory}")
+    return [cv2.imread(p) for p in paths]
+
+
+def count_matches(detections, reference, match_iou):
+    # One-to-one matching on IoU between boxes of the same class
+    boxes, classes = detections
+    ref_boxes, ref_classes = reference
+    if len(boxes) == 0 or len(ref_boxes) == 0:
+        return 0
+    iou = box_iou(boxes, ref_boxes)
+    iou[classes[:, None] != ref_classes[None, :]] = 0
+    return len(greedy_match(iou, match_iou))
+
+
+def run_configuration(model, frames):
+    model(frames[0], agnostic_nms=True)  # warm-up, excluded from timings
+    latencies = []
+    detections = []
+    for frame in frames:
+        start = time.perf_counter()
+        results = model(frame, agnostic_nms=True, verbose=False)
+        latencies.append(time.perf_counter() - start)
+        xyxy, _, class_ids, _ = boxes_to_arrays(results[0])
+        detections.append((xyxy, class_ids))
+    return np.array(latencies) * 1000, detections
+
+
+def agreement(detections, baseline, match_iou):
+    matched = sum(count_matches(d, b, match_iou) for d, b in zip(detections, baseline))
+    found = sum(len(d[0]) for d in detections)
+    expected = sum(len(b[0]) for b in baseline)
+    precision = matched / found if found else 1.0
+    recall = matched / expected if expected else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def main():
+    args = parse_arguments()
+    frames = load_frames(args.frames)
+
+    # Every configuration is judged against the large fp32 PyTorch model the app ships with
+    baseline_model = load_model(variant_weights("l"), "torch", 640, args.model_cache_dir, "fp32", args.conf, args.iou)
+    _, baseline = run_configuration(baseline_model, frames)
+
+    report = []
+    for variant, imgsz, backend, precision in itertools.product(args.models, args.imgsz, args.backends, args.precisions):
+        if backend == "torch" and precision == "int8":
+            continue
+        model = load_model(variant_weights(variant), backend, imgsz, args.model_cache_dir, precision, args.conf, args.iou)
+        latencies, detections = run_configuration(model, frames)
+        precision_vs_l, recall_vs_l, f1_vs_l = agreement(detections, baseline, args.match_iou)
+        report.append({
+            "model": variant,
+            "imgsz": imgsz,
+            "backend": backend,
+            "precision": precision,
+            "mean_ms": float(latencies.mean()),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "precision_vs_l": precision_vs_l,
+            "recall_vs_l": recall_vs_l,
+            "f1_vs_l": f1_vs_l,
+        })
+
+    print(f"{'model':>5} {'imgsz':>5} {'backend':>9} {'prec':>5} {'mean ms':>8} {'p95 ms':>8} {'agree F1':>8}")
+    for row in report:
+        print(f"{row['model']:>5} {row['imgsz']:>5} {row['backend']:>9} {row['precision']:>5} "
+              f"{row['mean_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['f1_vs_l']:>8.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"frames": len(frames), "configurations": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
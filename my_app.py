@@ -1,16 +1,67 @@
+# Imported first so startup times are measured from as close to process start as possible
+from preload import startup_timer
+import os
+import threading
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.uix.screenmanager import ScreenManager
-from home_screen import HomeScreen
+from home_screen import HomeScreen, SPOKEN_PHRASES as HOME_PHRASES
 from login_screen import LoginScreen
-from visuai_screen import VisuAI
+from visuai_screen import VisuAI, SPOKEN_PHRASES as VISUAI_PHRASES
+from speech import warm_up
+from microphone import WakeWordListener, get_microphone
+from speech_input import get_voice_input, speech_input_started
+import metrics
 
 class MyApp(App):
     def build(self):
+        # Render the fixed prompts in the background while the screens are built
+        warm_up(HOME_PHRASES, speed=1.0)
+        warm_up(VISUAI_PHRASES, speed=1.5)
         sm = ScreenManager()
         sm.add_widget(HomeScreen(name='home'))
         sm.add_widget(LoginScreen(name='login'))
-        sm.add_widget(VisuAI(name='visuai'))
+        self.visuai = VisuAI(name='visuai')
+        sm.add_widget(self.visuai)
         return sm
 
+    def on_start(self):
+        # The first frame is drawn on the next clock tick; from then on the UI responds to input
+        Clock.schedule_once(lambda dt: startup_timer.mark("interactive"))
+        # Open the camera and warm up the detector while the user is on the home and login screens
+        self.visuai.preload()
+        # Optional exporters, e.g. VISUAI_METRICS_PORT=9464 or VISUAI_METRICS_JSONL=metrics.jsonl
+        port = os.environ.get("VISUAI_METRICS_PORT")
+        _, self.metrics_dumper = metrics.configure(int(port) if port else None, os.environ.get("VISUAI_METRICS_JSONL"))
+        self.wake_word_listener = None
+        # Open the microphone and start calibrating the noise floor now, so the first voice command
+        # gets pre-roll and a calibrated VAD instead of paying for the device open
+        threading.Thread(target=self.start_voice_input, name="voice-input-start", daemon=True).start()
+
+    def start_voice_input(self):
+        # Background thread: opening the device and loading a Vosk model would otherwise hold up the UI
+        get_voice_input()
+        # Optional hands-free trigger, e.g. VISUAI_WAKE_WORD="hey visual"
+        wake_word = os.environ.get("VISUAI_WAKE_WORD")
+        if wake_word:
+            try:
+                self.wake_word_listener = WakeWordListener(get_microphone(), wake_word, self.on_wake_word)
+            except Exception as e:
+                print(f"An error occurred while starting the wake word listener: {e}")
+
+    def on_stop(self):
+        self.visuai.shutdown()
+        if speech_input_started():
+            get_voice_input().stop()
+        if self.wake_word_listener:
+            self.wake_word_listener.stop()
+        if self.metrics_dumper:
+            self.metrics_dumper.stop()
+        print(f"Startup times: {startup_timer.report()}")
+
+    def on_wake_word(self):
+        # Heard on the listener thread; the screen reacts on the main thread
+        Clock.schedule_once(lambda dt: self.root.current_screen.on_wake_word())
+
 if __name__ == '__main__':
     MyApp().run()
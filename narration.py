@@ -0,0 +1,68 @@
+import threading
+import time
+
+
+class NarrationWorker:
+    # Runs scene narration on a background thread so the frame loop never waits on the
+    # LLM round-trip or audio playback. Only the newest snapshot is kept: submitting while a
+    # request is pending replaces it, and at most one narration is in flight at a time.
+    def __init__(self, describe_fn, callback, max_age=4.0):
+        self.describe_fn = describe_fn
+        self.callback = callback
+        self.max_age = max_age
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self._pending = None
+        self._busy = False
+        self._running = True
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="narration", daemon=True)
+        self._thread.start()
+
+    def submit(self, object_descriptions, scene_summary, describe_fn=None, on_narrated=None):
+        # on_narrated() runs only if this snapshot is actually narrated, not dropped or superseded
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = (time.time(), list(object_descriptions), scene_summary, describe_fn or self.describe_fn,
+                             on_narrated)
+            self.submitted += 1
+            self._cond.notify()
+
+    def busy(self):
+        with self._cond:
+            return self._busy or self._pending is not None
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or not self._running)
+                if not self._running:
+                    return
+                submitted_at, object_descriptions, scene_summary, describe_fn, on_narrated = self._pending
+                self._pending = None
+                # A snapshot that sat in the queue too long no longer matches what is in front of the camera
+                if time.time() - submitted_at > self.max_age:
+                    self.dropped += 1
+                    continue
+                self._busy = True
+            try:
+                description = describe_fn(object_descriptions, scene_summary)
+                # None means the request was superseded and there is nothing to report
+                if description is not None:
+                    self.callback(description)
+                    if on_narrated is not None:
+                        on_narrated()
+            except Exception as e:
+                print(f"An error occurred during scene narration: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self.completed += 1
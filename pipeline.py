@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+import metrics
+
+# A frame travelling through the pipeline. captured_at is used to measure camera-to-box latency.
+FramePacket = namedtuple("FramePacket", ["index", "captured_at", "frame", "results"])
+
+
+class FrameSlot:
+    # Bounded hand-off between two stages. When full, the oldest item is dropped so the
+    # consumer always works on the most recent frame instead of a growing backlog.
+    def __init__(self, maxsize=1):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.closed = False
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self.closed, timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def depth(self):
+        with self._cond:
+            return len(self._items)
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class StageStats:
+    # Rolling frame rate and latency for one stage
+    def __init__(self, window=60):
+        self.count = 0
+        self.last_duration = 0.0
+        self.last_latency = 0.0
+        self._stamps = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, duration, latency=None):
+        with self._lock:
+            self.count += 1
+            self.last_duration = duration
+            if latency is not None:
+                self.last_latency = latency
+            self._stamps.append(time.perf_counter())
+
+    def fps(self):
+        with self._lock:
+            if len(self._stamps) < 2:
+                return 0.0
+            elapsed = self._stamps[-1] - self._stamps[0]
+            return (len(self._stamps) - 1) / elapsed if elapsed > 0 else 0.0
+
+
+class Stage(threading.Thread):
+    # Runs fn on every packet taken from in_slot and pushes the result to out_slot.
+    # A stage without an input slot is a source and calls fn(None) in a loop.
+    def __init__(self, name, fn, in_slot, out_slot, stop_event):
+        super(Stage, self).__init__(name=name, daemon=True)
+        self.fn = fn
+        self.in_slot = in_slot
+        self.out_slot = out_slot
+        self.stop_event = stop_event
+        self.stats = StageStats()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            packet = None
+            if self.in_slot is not None:
+                packet = self.in_slot.get(timeout=0.1)
+                if packet is None:
+                    continue
+            start = time.perf_counter()
+            try:
+                packet = self.fn(packet)
+            except Exception as e:
+                print(f"An error occurred in the {self.name} stage: {e}")
+                self.stop_event.set()
+                break
+            if packet is None:
+                if self.in_slot is None:
+                    # The source ran dry, e.g. the camera was disconnected
+                    self.stop_event.set()
+                continue
+            end = time.perf_counter()
+            self.stats.record(end - start, end - packet.captured_at)
+            self.out_slot.put(packet)
+        self.out_slot.close()
+
+
+class FramePipeline:
+    # Capture -> inference -> render, each on its own thread with drop-oldest slots between
+    # them. The capture thread always holds the newest camera frame so inference never works
+    # on frames that piled up in the driver buffer while the model was busy.
+    def __init__(self, cap, model, render_fn, queue_size=1):
+        self.cap = cap
+        self.model = model
+        self.render_fn = render_fn
+        self.stop_event = threading.Event()
+        self.capture_slot = FrameSlot(queue_size)
+        self.inference_slot = FrameSlot(queue_size)
+        self.display_slot = FrameSlot(1)
+        self._index = 0
+        self.stages = [
+            Stage("capture", self._capture, None, self.capture_slot, self.stop_event),
+            Stage("inference", self._infer, self.capture_slot, self.inference_slot, self.stop_event),
+            Stage("render", self._render, self.inference_slot, self.display_slot, self.stop_event),
+        ]
+
+    def _capture(self, _):
+        with metrics.timer("capture"):
+            ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self._index += 1
+        return FramePacket(self._index, time.perf_counter(), frame, None)
+
+    def _infer(self, packet):
+        with metrics.timer("inference"):
+            results = self.model(packet.frame, agnostic_nms=True)
+        return packet._replace(results=results)
+
+    def _render(self, packet):
+        self.render_fn(packet)
+        # Camera frame to finished boxes and descriptions
+        metrics.observe("frame_latency", time.perf_counter() - packet.captured_at)
+        return packet
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self, timeout=1.0):
+        # timeout=None waits until every stage thread has exited
+        self.stop_event.set()
+        for stage in self.stages:
+            stage.join(timeout=timeout)
+
+    def running(self):
+        return not self.stop_event.is_set()
+
+    def latest(self, timeout=None):
+        return self.display_slot.get(timeout)
+
+    def stats(self):
+        stats = {}
+        for stage in self.stages:
+            stats[stage.name] = {
+                "fps": stage.stats.fps(),
+                "queue_depth": stage.out_slot.depth(),
+                "dropped": stage.out_slot.dropped,
+                "duration_ms": stage.stats.last_duration * 1000,
+                "latency_ms": stage.stats.last_latency * 1000,
+            }
+        return stats
+
+    def format_stats(self):
+        return " | ".join(
+            f"{name}: {s['fps']:.1f} fps, depth {s['queue_depth']}, dropped {s['dropped']}, latency {s['latency_ms']:.0f} ms"
+            for name, s in self.stats().items()
+        )
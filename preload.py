@@ -0,0 +1,78 @@
+import threading
+import time
+
+import numpy as np
+
+
+class StartupTimer:
+    # Seconds from process start (taken as the first import of this module) to named milestones
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        with self._lock:
+            if name in self.marks:
+                return
+            self.marks[name] = time.perf_counter() - self.started_at
+        print(f"Startup: {name} after {self.marks[name]:.2f} s")
+
+    def report(self):
+        with self._lock:
+            return dict(self.marks)
+
+
+startup_timer = StartupTimer()
+
+
+class Preloader:
+    # Opens the camera and loads the detector on background threads, in parallel, and runs one
+    # dummy inference so the first real frame doesn't pay for lazy initialisation inside the model.
+    def __init__(self, open_camera, load_model, frame_shape):
+        self.open_camera = open_camera
+        self.load_model = load_model
+        self.frame_shape = frame_shape
+        self.camera = None
+        self.model = None
+        self.error = None
+        self._camera_ready = threading.Event()
+        self._model_ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._load_camera, name="preload-camera", daemon=True).start()
+        threading.Thread(target=self._load_model, name="preload-model", daemon=True).start()
+        return self
+
+    def _load_camera(self):
+        try:
+            self.camera = self.open_camera()
+            startup_timer.mark("camera_open")
+        except Exception as e:
+            print(f"An error occurred while opening the camera: {e}")
+            self.error = e
+        finally:
+            self._camera_ready.set()
+
+    def _load_model(self):
+        try:
+            model = self.load_model()
+            startup_timer.mark("model_loaded")
+            model(np.zeros(self.frame_shape, dtype=np.uint8), agnostic_nms=True)
+            startup_timer.mark("model_warm")
+            self.model = model
+        except Exception as e:
+            print(f"An error occurred while loading the model: {e}")
+            self.error = e
+        finally:
+            self._model_ready.set()
+
+    def ready(self):
+        return self._camera_ready.is_set() and self._model_ready.is_set()
+
+    def result(self, timeout=None):
+        # (camera, model) once both are loaded; either is None if loading failed or timed out
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        self._camera_ready.wait(timeout)
+        self._model_ready.wait(None if deadline is None else max(deadline - time.perf_counter(), 0))
+        return self.camera, self.model
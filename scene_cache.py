@@ -0,0 +1,85 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Per-object descriptions are "I see a {size} {class} at the {direction}. The color of the object is {colour}."
+# followed by the exact angles. Only the bucketed part identifies the scene.
+ANGLE_MARKER = " It is positioned at an angle"
+
+
+def scene_signature(object_descriptions, scene_summary):
+    # Canonical key for a scene: the bucketed object words, order-independent, plus the class counts
+    bucketed = sorted(description.split(ANGLE_MARKER, 1)[0] for description in object_descriptions)
+    canonical = "\n".join([scene_summary, *bucketed])
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class SceneDescriptionCache:
+    # LRU + TTL cache of generated scene descriptions, optionally persisted to a SQLite file
+    # so repeated scenes are narrated without a network round-trip even after a restart.
+    def __init__(self, max_entries=256, ttl=120.0, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS scene_descriptions "
+                             "(signature TEXT PRIMARY KEY, description TEXT, created REAL)")
+            self._db.commit()
+
+    def get(self, signature):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(signature)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT description, created FROM scene_descriptions WHERE signature = ?",
+                                       (signature,)).fetchone()
+                if row is not None:
+                    entry = (row[1], row[0])
+                    self._remember(signature, entry)
+            if entry is not None and now - entry[0] > self.ttl:
+                # Expired: forget it here and on disk rather than keep re-reading it
+                self._entries.pop(signature, None)
+                if self._db is not None:
+                    self._db.execute("DELETE FROM scene_descriptions WHERE signature = ?", (signature,))
+                    self._db.commit()
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(signature)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, signature, description):
+        created = time.time()
+        with self._lock:
+            self._remember(signature, (created, description))
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO scene_descriptions VALUES (?, ?, ?)",
+                                 (signature, description, created))
+                self._db.execute("DELETE FROM scene_descriptions WHERE created < ?", (created - self.ttl,))
+                self._db.commit()
+
+    def _remember(self, signature, entry):
+        # Caller holds the lock; the least recently used entries beyond max_entries are dropped
+        self._entries[signature] = entry
+        self._entries.move_to_end(signature)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
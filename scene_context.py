@@ -0,0 +1,113 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+# Average characters per token for English, used when no tokenizer is installed
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+
+
+def count_tokens(text):
+    # tiktoken when available (cl100k is close enough for any chat model), otherwise ~4 chars/token
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            _encoding = False
+        except Exception as e:
+            # e.g. the BPE file isn't cached yet and the device is offline
+            print(f"Falling back to estimated token counts: {e}")
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def serialize_scene(objects, max_tokens=150):
+    # One line per class instead of one sentence per object: count, then each distinct position
+    # with its mean horizontal angle. Classes are ordered by how much of the view they cover, and
+    # whatever does not fit in the budget is summarised as a count.
+    if not objects:
+        return "nothing detected"
+    groups = {}
+    for obj in objects:
+        groups.setdefault(obj["class_name"], []).append(obj)
+
+    def coverage(members):
+        return sum(float((o["bbox"][2] - o["bbox"][0]) * (o["bbox"][3] - o["bbox"][1])) for o in members)
+
+    lines = []
+    used = 0
+    ordered = sorted(groups.items(), key=lambda item: coverage(item[1]), reverse=True)
+    for i, (class_name, members) in enumerate(ordered):
+        positions = {}
+        for obj in members:
+            positions.setdefault(obj["direction"], []).append(obj["h_angle"])
+        where = ", ".join(f"{direction} {np.mean(angles):+.0f}deg" + (f" x{len(angles)}" if len(angles) > 1 else "")
+                          for direction, angles in positions.items())
+        line = f"{class_name} x{len(members)}: {where}"
+        tokens = count_tokens(line) + 1
+        if used + tokens > max_tokens:
+            remaining = len(ordered) - i
+            lines.append(f"+{remaining} more object type{'s' if remaining > 1 else ''}")
+            break
+        lines.append(line)
+        used += tokens
+    return "\n".join(lines)
+
+
+class ConversationHistory:
+    # The last few question/answer pairs, trimmed to a token budget from the oldest end
+    def __init__(self, max_turns=4, max_tokens=200):
+        self.max_tokens = max_tokens
+        self._turns = deque(maxlen=max_turns)
+        self._lock = threading.Lock()
+
+    def add(self, query, response):
+        with self._lock:
+            self._turns.append((query, response))
+
+    def render(self):
+        with self._lock:
+            turns = list(self._turns)
+        lines = []
+        used = 0
+        for query, response in reversed(turns):
+            turn = f"User: {query}\nAssistant: {response}"
+            tokens = count_tokens(turn)
+            if used + tokens > self.max_tokens:
+                break
+            lines.append(turn)
+            used += tokens
+        return "\n".join(reversed(lines))
+
+    def clear(self):
+        with self._lock:
+            self._turns.clear()
+
+
+class PromptMeter:
+    # Tokens per request, to check that prompts stay bounded however busy the scene gets
+    def __init__(self, window=200):
+        self._sizes = deque(maxlen=window)
+
+    def record(self, prompt):
+        tokens = count_tokens(prompt)
+        self._sizes.append(tokens)
+        return tokens
+
+    def report(self):
+        sizes = np.array(self._sizes)
+        if sizes.size == 0:
+            return {"count": 0}
+        return {
+            "count": int(sizes.size),
+            "mean_tokens": float(sizes.mean()),
+            "p95_tokens": float(np.percentile(sizes, 95)),
+            "max_tokens": int(sizes.max()),
+        }
@@ -0,0 +1,90 @@
+import math
+import time
+
+import numpy as np
+
+from tracking import IoUTracker
+
+
+class SceneChanges:
+    # What changed in the scene since it was last narrated
+    def __init__(self, appeared, disappeared, moved):
+        self.appeared = appeared
+        self.disappeared = disappeared
+        self.moved = moved
+
+    def __bool__(self):
+        return bool(self.appeared or self.disappeared or self.moved)
+
+    def sentences(self):
+        sentences = []
+        for obj in self.appeared:
+            sentences.append(f"A {obj['size']} {obj['class_name']} appeared at the {obj['direction']}. "
+                             f"The color of the object is {obj['color']}.")
+        for obj in self.disappeared:
+            sentences.append(f"The {obj['class_name']} at the {obj['direction']} is no longer visible.")
+        for before, after in self.moved:
+            if before["direction"] != after["direction"]:
+                sentences.append(f"The {after['class_name']} moved from the {before['direction']} to the {after['direction']}.")
+            else:
+                sentences.append(f"The {after['class_name']} at the {after['direction']} moved noticeably.")
+        return sentences
+
+
+class SceneState:
+    # Gives every object from annotate_frame a persistent ID and remembers what was last narrated,
+    # so narration can report only what appeared, disappeared or moved.
+    def __init__(self, frame_width, frame_height, move_threshold=0.15, disappear_after=1.5):
+        self.frame_diagonal = math.hypot(frame_width, frame_height)
+        self.move_threshold = move_threshold
+        self.disappear_after = disappear_after
+        self.tracker = IoUTracker(max_misses=10)
+        self.objects = {}
+        self.reported = None
+        self._class_indices = {}
+
+    def _class_index(self, class_name):
+        return self._class_indices.setdefault(class_name, len(self._class_indices))
+
+    def update(self, objects, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        track_ids = [obj["track_id"] for obj in objects]
+        if objects and any(track_id is None for track_id in track_ids):
+            # Results that do not come from TrackedDetector are associated here instead
+            self.tracker.predict()
+            detections = np.array([[*obj["bbox"], obj["confidence"], self._class_index(obj["class_name"])] for obj in objects])
+            track_ids = self.tracker.update(detections)
+        for track_id, obj in zip(track_ids, objects):
+            self.objects[track_id] = (timestamp, obj)
+        # Forget objects that have been gone for a while
+        self.objects = {k: v for k, v in self.objects.items() if timestamp - v[0] <= self.disappear_after}
+
+    def visible(self):
+        return {track_id: obj for track_id, (_, obj) in self.objects.items()}
+
+    def has_baseline(self):
+        return self.reported is not None
+
+    def mark_reported(self, reported=None):
+        # reported is the visible() snapshot a narration was built from; defaults to the current scene
+        self.reported = self.visible() if reported is None else reported
+
+    def _center(self, obj):
+        x1, y1, x2, y2 = obj["bbox"]
+        return (x1 + x2) / 2, (y1 + y2) / 2
+
+    def changes(self):
+        current = self.visible()
+        reported = self.reported or {}
+        appeared = [obj for track_id, obj in current.items() if track_id not in reported]
+        disappeared = [obj for track_id, obj in reported.items() if track_id not in current]
+        moved = []
+        for track_id, obj in current.items():
+            if track_id not in reported:
+                continue
+            before = reported[track_id]
+            (bx, by), (ax, ay) = self._center(before), self._center(obj)
+            distance = math.hypot(ax - bx, ay - by) / self.frame_diagonal
+            if before["direction"] != obj["direction"] or distance > self.move_threshold:
+                moved.append((before, obj))
+        return SceneChanges(appeared, disappeared, moved)
@@ -0,0 +1,44 @@
+import threading
+import time
+from collections import namedtuple
+
+# Everything known about one processed frame. captured_at is on the time.perf_counter() clock.
+SceneSnapshot = namedtuple("SceneSnapshot", ["index", "captured_at", "frame", "objects", "object_descriptions",
+                                             "scene_summary"])
+
+
+class LatestSceneStore:
+    # Holds the newest snapshot published by the live detection loop, so other threads can read
+    # the current scene instead of grabbing a camera frame and running the model themselves.
+    def __init__(self):
+        self.published = 0
+        self._snapshot = None
+        self._cond = threading.Condition()
+
+    def publish(self, snapshot):
+        with self._cond:
+            self._snapshot = snapshot
+            self.published += 1
+            self._cond.notify_all()
+
+    def latest(self):
+        return self._snapshot
+
+    def age(self, snapshot=None):
+        snapshot = snapshot or self._snapshot
+        return time.perf_counter() - snapshot.captured_at if snapshot is not None else None
+
+    def get(self, max_age=1.0, timeout=2.0):
+        # Newest snapshot if it is at most max_age seconds old, otherwise waits up to timeout for the
+        # next one. Falls back to whatever is there (possibly stale, possibly None) on timeout.
+        with self._cond:
+            snapshot = self._snapshot
+            if snapshot is not None and self.age(snapshot) <= max_age:
+                return snapshot
+            published = self.published
+            self._cond.wait_for(lambda: self.published > published, timeout)
+            return self._snapshot
+
+    def clear(self):
+        with self._cond:
+            self._snapshot = None
@@ -0,0 +1,129 @@
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import metrics
+from audio_cache import AudioCache
+from audio_dsp import time_stretch
+from audio_output import PRIORITY_RESPONSE, get_audio_output
+from tts_backends import create_backend
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in SENTENCE_END.split(text) if sentence.strip()]
+
+
+def iter_sentences(text):
+    # Accepts a whole string or an iterable of text pieces, e.g. an LLM response being streamed
+    if isinstance(text, str):
+        yield from split_sentences(text)
+        return
+    for piece in text:
+        yield from split_sentences(piece)
+
+
+class SpeechService:
+    # The single speech path for every screen: one backend, a phrase cache and sentence-streamed
+    # playback. Synthesis runs a couple of sentences ahead of playback on a small worker pool.
+    def __init__(self, backend, cache=None, max_workers=3):
+        self.backend = backend
+        self.cache = cache if cache is not None else AudioCache()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+        # Warm-up renders one phrase at a time on its own worker, so live speech never queues behind it
+        self._warm_up_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-warm-up")
+        self._latencies = deque(maxlen=200)
+        self._lock = threading.Lock()
+
+    def synthesize(self, sentence, lang="en"):
+        start = time.perf_counter()
+        audio = self.backend.synthesize(sentence, lang)
+        latency = time.perf_counter() - start
+        metrics.observe("tts_synthesis", latency)
+        with self._lock:
+            self._latencies.append(latency)
+        return audio
+
+    def render(self, sentence, lang="en", speed=1.0):
+        audio = self.cache.get(sentence, lang, speed, self.backend.name)
+        if audio is None:
+            audio = time_stretch(self.synthesize(sentence, lang), speed)
+            self.cache.put(sentence, audio, lang, speed, self.backend.name)
+        return audio
+
+    def warm_up(self, phrases, lang="en", speed=1.0):
+        # Pre-render fixed prompts in the background so button feedback plays instantly, and offline
+        # once they are on disk. Phrases are split like speak splits them so the keys match.
+        for phrase in phrases:
+            for sentence in split_sentences(phrase):
+                self._warm_up_executor.submit(self.render, sentence, lang, speed)
+
+    def speak(self, text, speed=1.0, lang="en", priority=PRIORITY_RESPONSE, tag=None, wait=False):
+        # Sentence k plays while sentence k+1 is still being synthesized, so the time to first audio
+        # is one short sentence instead of the whole response. Playback goes through the shared
+        # audio output queue; the returned ID can be used to cancel or wait for the utterance.
+        chunks = queue.Queue()
+
+        def submit_sentences():
+            try:
+                for sentence in iter_sentences(text):
+                    chunks.put(self._executor.submit(self.render, sentence, lang, speed))
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(None)
+
+        threading.Thread(target=submit_sentences, daemon=True).start()
+        output = get_audio_output()
+        item_id = output.submit(chunks, priority, tag)
+        if wait:
+            output.wait(item_id)
+        return item_id
+
+    def latency_report(self):
+        # Synthesis time per sentence for the active backend, cache hits excluded
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+        if latencies.size == 0:
+            return {"backend": self.backend.name, "count": 0}
+        return {
+            "backend": self.backend.name,
+            "count": int(latencies.size),
+            "mean_ms": float(latencies.mean()),
+            "p95_ms": float(np.percentile(latencies, 95)),
+        }
+
+
+_service = None
+_service_lock = threading.RLock()
+
+
+def configure(backend=None, **backend_kwargs):
+    # Select the speech backend by name; defaults to $VISUAI_TTS_BACKEND, then gtts
+    global _service
+    name = backend or os.environ.get("VISUAI_TTS_BACKEND", "gtts")
+    with _service_lock:
+        _service = SpeechService(create_backend(name, **backend_kwargs))
+    return _service
+
+
+def get_speech_service():
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                return configure()
+    return _service
+
+
+def speak_streamed(text, speed=1.5, lang="en", priority=PRIORITY_RESPONSE, tag=None, wait=False):
+    return get_speech_service().speak(text, speed, lang, priority, tag, wait)
+
+
+def warm_up(phrases, lang="en", speed=1.0):
+    get_speech_service().warm_up(phrases, lang, speed)
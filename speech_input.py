@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+import metrics
+from microphone import BLOCK_MS, SAMPLE_RATE, get_microphone
+
+Transcript = namedtuple("Transcript", ["text", "latency"])
+
+
+class NoSpeechError(Exception):
+    pass
+
+
+class RecognitionError(Exception):
+    pass
+
+
+class GoogleRecognizer:
+    # The existing online recognizer. It can only decode once the whole utterance is recorded.
+    name = "google"
+
+    def __init__(self):
+        import speech_recognition as sr
+
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+        self._chunks = []
+
+    def start(self):
+        self._chunks = []
+
+    def accept(self, pcm):
+        self._chunks.append(pcm)
+
+    def finish(self):
+        audio = self.sr.AudioData(b"".join(self._chunks), SAMPLE_RATE, 2)
+        try:
+            return self.recognizer.recognize_google(audio)
+        except self.sr.UnknownValueError:
+            return ""
+        except self.sr.RequestError as e:
+            raise RecognitionError(str(e))
+
+
+class VoskRecognizer:
+    # Offline Kaldi recognizer that decodes every block as it arrives, so only the last few
+    # hundred milliseconds are left to process when the user stops talking.
+    name = "vosk"
+
+    def __init__(self, model_path=None):
+        from vosk import KaldiRecognizer, Model
+
+        model_path = model_path or os.environ.get("VISUAI_VOSK_MODEL")
+        if not model_path:
+            raise RuntimeError("Set VISUAI_VOSK_MODEL to a Vosk model directory to use the vosk backend")
+        self._model = Model(model_path)
+        self._factory = KaldiRecognizer
+        self._recognizer = None
+
+    def start(self):
+        self._recognizer = self._factory(self._model, SAMPLE_RATE)
+
+    def accept(self, pcm):
+        self._recognizer.AcceptWaveform(pcm)
+
+    def finish(self):
+        return json.loads(self._recognizer.FinalResult()).get("text", "")
+
+
+RECOGNIZERS = {
+    "google": GoogleRecognizer,
+    "vosk": VoskRecognizer,
+}
+
+
+def create_recognizer(name=None, **kwargs):
+    name = name or os.environ.get("VISUAI_ASR_BACKEND", "google")
+    if name not in RECOGNIZERS:
+        raise ValueError(f"Unknown speech recognition backend '{name}', expected one of {', '.join(RECOGNIZERS)}")
+    return RECOGNIZERS[name](**kwargs)
+
+
+def block_energy(pcm):
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+
+class EnergyVAD:
+    # Voice activity from block energy against a running noise floor. The floor keeps adapting on
+    # blocks classified as silence, which replaces the per-press adjust_for_ambient_noise call.
+    def __init__(self, ratio=3.0, min_energy=150.0, adaptation=0.05):
+        self.ratio = ratio
+        self.min_energy = min_energy
+        self.adaptation = adaptation
+        self.noise_floor = None
+
+    def is_speech(self, pcm):
+        energy = block_energy(pcm)
+        if self.noise_floor is None:
+            self.noise_floor = energy
+        speech = energy > max(self.noise_floor * self.ratio, self.min_energy)
+        if not speech:
+            self.noise_floor += self.adaptation * (energy - self.noise_floor)
+        return speech
+
+
+class VoiceInput:
+    # Speech input on top of the shared microphone capture, with VAD endpointing and a pluggable
+    # recognizer. A background reader keeps the noise floor calibrated between requests.
+    def __init__(self, microphone=None, recognizer=None, vad=None, silence_ms=600, max_phrase_s=15.0,
+                 preroll_ms=300):
+        self.microphone = microphone or get_microphone()
+        self.recognizer = recognizer or create_recognizer()
+        self.vad = vad or EnergyVAD()
+        self.silence_blocks = silence_ms // BLOCK_MS
+        self.max_phrase_blocks = int(max_phrase_s * 1000 / BLOCK_MS)
+        self.preroll_ms = preroll_ms
+        self._listening = threading.Event()
+        self._listen_lock = threading.Lock()
+        self._latencies = deque(maxlen=100)
+        self._stopped = threading.Event()
+        threading.Thread(target=self._calibrate, name="noise-floor", daemon=True).start()
+
+    def _calibrate(self):
+        # Runs until stop(), or until a replayed file has been read to the end
+        reader = self.microphone.reader()
+        while not self._stopped.is_set() and not reader.ended:
+            pcm = reader.read_block()
+            if pcm is not None and not self._listening.is_set():
+                self.vad.is_speech(pcm)
+
+    def stop(self):
+        self._stopped.set()
+
+    def listen(self, timeout=10.0, preroll_ms=None):
+        # Returns a Transcript once the user stops talking. Raises NoSpeechError when nobody spoke
+        # within timeout or nothing intelligible was said, RecognitionError when the backend failed.
+        with self._listen_lock:
+            self._listening.set()
+            try:
+                self.recognizer.start()
+                preroll_ms = self.preroll_ms if preroll_ms is None else preroll_ms
+                speech_ended_at = self._collect(self.microphone.reader(preroll_ms), timeout)
+            finally:
+                self._listening.clear()
+            text = self.recognizer.finish()
+            latency = time.perf_counter() - speech_ended_at
+            metrics.observe("speech_recognition", latency)
+            self._latencies.append(latency)
+            if not text:
+                raise NoSpeechError()
+            return Transcript(text, latency)
+
+    def _collect(self, reader, timeout):
+        # Returns when the user stops talking, the phrase hits max_phrase_s of wall-clock time, or
+        # the source stalls or ends mid-phrase; in those cases the audio heard so far is decoded.
+        deadline = time.perf_counter() + timeout
+        phrase_deadline = None
+        # Blocks just before the VAD fired, so the onset of the first syllable is not clipped
+        preroll = deque(maxlen=max(self.preroll_ms // BLOCK_MS, 1))
+        heard_speech = False
+        silent_blocks = 0
+        phrase_blocks = 0
+        last_speech_at = None
+        while True:
+            if not heard_speech and time.perf_counter() > deadline:
+                raise NoSpeechError()
+            if heard_speech and time.perf_counter() > phrase_deadline:
+                return last_speech_at
+            pcm = reader.read_block()
+            if pcm is None:
+                if heard_speech:
+                    # A full read timeout mid-phrase means the device stalled or the file ended
+                    return last_speech_at
+                if reader.ended:
+                    raise NoSpeechError()
+                continue
+            speech = self.vad.is_speech(pcm)
+            if not heard_speech:
+                if not speech:
+                    preroll.append(pcm)
+                    continue
+                heard_speech = True
+                phrase_deadline = time.perf_counter() + self.max_phrase_blocks * BLOCK_MS / 1000
+                for earlier in preroll:
+                    self.recognizer.accept(earlier)
+            # Decoding happens here, block by block, while the user is still talking
+            self.recognizer.accept(pcm)
+            phrase_blocks += 1
+            if speech:
+                silent_blocks = 0
+                last_speech_at = time.perf_counter()
+            else:
+                silent_blocks += 1
+            if silent_blocks >= self.silence_blocks or phrase_blocks >= self.max_phrase_blocks:
+                return last_speech_at
+
+    def latency_report(self):
+        # Seconds from the last voiced block to the finished transcript
+        latencies = np.array(self._latencies) * 1000
+        if latencies.size == 0:
+            return {"backend": self.recognizer.name, "count": 0}
+        return {
+            "backend": self.recognizer.name,
+            "count": int(latencies.size),
+            "mean_ms": float(latencies.mean()),
+            "p95_ms": float(np.percentile(latencies, 95)),
+        }
+
+
+_voice_input = None
+_voice_input_lock = threading.Lock()
+
+
+def get_voice_input():
+    global _voice_input
+    if _voice_input is None:
+        with _voice_input_lock:
+            if _voice_input is None:
+                _voice_input = VoiceInput()
+    return _voice_input
+
+
+def speech_input_started():
+    return _voice_input is not None
@@ -0,0 +1,43 @@
+import pytest
+
+from intents import SceneQueryRouter, pluralize
+
+LABELS = ["person", "mouse", "knife", "sheep", "skis", "scissors", "cup", "bus"]
+
+
+def scene_object(class_name, direction="middle center", h_angle=0.0):
+    return {"class_name": class_name, "direction": direction, "size": "small", "h_angle": h_angle, "color": "dark"}
+
+
+@pytest.fixture
+def router():
+    return SceneQueryRouter(LABELS)
+
+
+@pytest.mark.parametrize("name, plural", [
+    ("person", "people"),
+    ("mouse", "mice"),
+    ("knife", "knives"),
+    ("sheep", "sheep"),
+    ("skis", "skis"),
+    ("scissors", "scissors"),
+    ("cup", "cups"),
+    ("bus", "buses"),
+])
+def test_pluralize(name, plural):
+    assert pluralize(name, 2) == plural
+    assert pluralize(name, 1) == name
+
+
+def test_count_irregular_plural(router):
+    objects = [scene_object("mouse"), scene_object("mouse")]
+    assert router.answer("how many mice are there", objects) == "There are 2 mice."
+
+
+def test_count_label_that_is_already_plural(router):
+    assert router.answer("how many scissors are there", []) == "I don't see any scissors right now."
+
+
+def test_direction_lists_irregular_plurals(router):
+    objects = [scene_object(name, "middle left", -20.0) for name in ("knife", "knife", "sheep", "sheep", "skis", "skis")]
+    assert router.answer("what is on my left", objects) == "On your left I see 2 knives, 2 sheep, 2 skis."
@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+
+import llm_client
+from llm_client import LLMTimeoutError, StubClient, SupersededError, configure, get_llm_client
+from scene_cache import SceneDescriptionCache
+
+
+class HangingClient(StubClient):
+    # Never answers until released, like a provider whose socket stalls
+    def __init__(self):
+        super(HangingClient, self).__init__()
+        self.release = threading.Event()
+
+    def create(self, model, messages, stream=False):
+        self.calls += 1
+        self.release.wait(5)
+        return super(HangingClient, self).create(model, messages, stream)
+
+
+@pytest.fixture(autouse=True)
+def shared_client():
+    yield
+    llm_client._shared = None
+
+
+def test_complete_returns_stub_response():
+    client = configure(client_factory=lambda: StubClient("Hello there."))
+    assert client.complete("prompt") == "Hello there."
+    assert get_llm_client() is client
+
+
+def test_deadline_raises_timeout():
+    configure(client_factory=lambda: StubClient(delay=1.0), timeout=0.1)
+    start = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        get_llm_client().complete("prompt")
+    assert time.monotonic() - start < 0.5
+    assert get_llm_client().timeouts == 1
+
+
+def test_timed_out_requests_release_their_slot():
+    hanging = HangingClient()
+    client = configure(client_factory=lambda: hanging, timeout=0.1, max_workers=2)
+    for _ in range(2):
+        with pytest.raises(LLMTimeoutError):
+            client.complete("prompt")
+    # Both earlier calls are still stuck in the provider, yet a new request starts at once
+    start = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        client.complete("prompt")
+    assert hanging.calls == 3
+    assert time.monotonic() - start < 0.5
+    hanging.release.set()
+
+
+def test_newer_request_supersedes_older_on_same_channel():
+    client = configure(client_factory=lambda: StubClient(delay=0.5))
+    errors = []
+
+    def first():
+        try:
+            client.complete("first", channel="query")
+        except SupersededError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    time.sleep(0.1)
+    assert client.complete("second", channel="query") == StubClient().response
+    thread.join()
+    assert len(errors) == 1
+    assert client.superseded == 1
+
+
+def test_other_channels_are_not_superseded():
+    client = configure(client_factory=lambda: StubClient(delay=0.2))
+    results = []
+    thread = threading.Thread(target=lambda: results.append(client.complete("scene", channel="scene")))
+    thread.start()
+    client.complete("query", channel="query")
+    thread.join()
+    assert results == [StubClient().response]
+
+
+def test_stream_sentences_yields_each_sentence():
+    client = configure(client_factory=lambda: StubClient("One. Two! Three?", delay=0.05))
+    assert list(client.stream_sentences("prompt")) == ["One.", "Two!", "Three?"]
+
+
+def test_superseded_stream_ends_without_waiting_for_deadline():
+    client = configure(client_factory=lambda: StubClient("A long answer. With two sentences.", delay=2.0),
+                       timeout=10.0)
+    outcome = []
+
+    def consume():
+        try:
+            outcome.append(list(client.stream_sentences("first", channel="query")))
+        except SupersededError:
+            outcome.append("superseded")
+
+    thread = threading.Thread(target=consume)
+    start = time.monotonic()
+    thread.start()
+    time.sleep(0.1)
+    client._begin("query")
+    thread.join(2.0)
+    assert outcome == ["superseded"]
+    assert time.monotonic() - start < 1.0
+
+
+def test_stream_deadline_raises_timeout():
+    client = configure(client_factory=lambda: StubClient("Slow.", delay=1.0), timeout=0.1)
+    with pytest.raises(LLMTimeoutError):
+        list(client.stream_sentences("prompt"))
+    assert client.timeouts == 1
+
+
+def test_configure_closes_the_replaced_client():
+    old = configure(client_factory=lambda: StubClient(delay=1.0))
+    errors = []
+
+    def wait_on_old():
+        try:
+            old.complete("prompt", channel="scene")
+        except SupersededError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=wait_on_old)
+    thread.start()
+    time.sleep(0.1)
+    configure(client_factory=StubClient)
+    thread.join(0.5)
+    assert len(errors) == 1
+
+
+def test_generate_scene_description_uses_cache():
+    main = pytest.importorskip("main")
+    stub = StubClient("A table and two chairs.")
+    configure(client_factory=lambda: stub)
+    cache = SceneDescriptionCache()
+    descriptions = ["I see a small cup at the center center. The color of the object is dark. "
+                    "It is positioned at an angle of 0.00 degrees horizontally and 0.00 degrees vertically."]
+    first = main.generate_scene_description(descriptions, "Here's what I see: 1 cup(s)", cache)
+    second = main.generate_scene_description(descriptions, "Here's what I see: 1 cup(s)", cache)
+    assert first == second == "A table and two chairs."
+    assert stub.calls == 1
+
+
+def test_stream_user_query_response_yields_sentences():
+    main = pytest.importorskip("main")
+    configure(client_factory=lambda: StubClient("There is a cup. It is on the left."))
+    assert list(main.stream_user_query_response("Where is the cup?")) == ["There is a cup.", "It is on the left."]
@@ -0,0 +1,59 @@
+import time
+
+from scene_cache import SceneDescriptionCache, scene_signature
+
+CUP = "I see a small cup at the center center. The color of the object is dark."
+CHAIR = "I see a large chair at the middle left. The color of the object is light."
+
+
+def test_signature_ignores_angles_and_order():
+    first = scene_signature([CUP + " It is positioned at an angle of 1.00 degrees horizontally.", CHAIR], "2 objects")
+    second = scene_signature([CHAIR, CUP + " It is positioned at an angle of 3.50 degrees horizontally."], "2 objects")
+    assert first == second
+    assert scene_signature([CUP], "1 object") != scene_signature([CHAIR], "1 object")
+
+
+def test_get_returns_cached_description():
+    cache = SceneDescriptionCache()
+    assert cache.get("scene") is None
+    cache.put("scene", "A cup on a table.")
+    assert cache.get("scene") == "A cup on a table."
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SceneDescriptionCache(max_entries=2)
+    cache.put("a", "A.")
+    cache.put("b", "B.")
+    cache.get("a")
+    cache.put("c", "C.")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A."
+    assert cache.stats()["entries"] == 2
+
+
+def test_expired_entry_is_dropped():
+    cache = SceneDescriptionCache(ttl=0.05)
+    cache.put("scene", "A cup.")
+    time.sleep(0.1)
+    assert cache.get("scene") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_descriptions_persist_across_instances(tmp_path):
+    db_path = str(tmp_path / "scenes.db")
+    writer = SceneDescriptionCache(db_path=db_path)
+    for name in "abc":
+        writer.put(name, name.upper() + ".")
+    reader = SceneDescriptionCache(max_entries=2, db_path=db_path)
+    assert [reader.get(name) for name in "abc"] == ["A.", "B.", "C."]
+    assert reader.stats()["entries"] == 2
+
+
+def test_expired_entries_are_deleted_from_disk(tmp_path):
+    db_path = str(tmp_path / "scenes.db")
+    SceneDescriptionCache(db_path=db_path).put("scene", "A cup.")
+    time.sleep(0.1)
+    assert SceneDescriptionCache(ttl=0.05, db_path=db_path).get("scene") is None
+    assert SceneDescriptionCache(ttl=60.0, db_path=db_path).get("scene") is None
@@ -0,0 +1,207 @@
+import math
+import time
+
+import cv2
+import numpy as np
+
+
+def box_iou(a, b):
+    # Pairwise IoU between two sets of xyxy boxes
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+
+def greedy_match(iou, threshold):
+    # One-to-one assignment, best IoU first. Returns (row, col) pairs above the threshold.
+    pairs = []
+    if iou.size == 0:
+        return pairs
+    iou = iou.copy()
+    while True:
+        i, j = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[i, j] < threshold:
+            return pairs
+        pairs.append((i, j))
+        iou[i, :] = 0
+        iou[:, j] = 0
+
+
+class TrackedBoxes:
+    # Same column layout as Ultralytics Boxes.data for tracked results:
+    # x1, y1, x2, y2, track id, confidence, class
+    def __init__(self, data):
+        self.data = data
+
+    @property
+    def xyxy(self):
+        return self.data[:, :4]
+
+    @property
+    def id(self):
+        return self.data[:, 4]
+
+    @property
+    def conf(self):
+        return self.data[:, 5]
+
+    @property
+    def cls(self):
+        return self.data[:, 6]
+
+
+class TrackedResult:
+    def __init__(self, data):
+        self.boxes = TrackedBoxes(data)
+
+
+class Track:
+    def __init__(self, track_id, box, confidence, class_id, frame_index):
+        self.id = track_id
+        self.box = box.astype(np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.confidence = confidence
+        self.class_id = class_id
+        self.observed_box = self.box.copy()
+        self.observed_frame = frame_index
+        self.misses = 0
+
+
+class IoUTracker:
+    # Associates detections to existing tracks by IoU (same class only) and carries boxes
+    # forward with a constant-velocity model on frames where the detector does not run.
+    def __init__(self, iou_threshold=0.3, max_misses=3, smoothing=0.5):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.smoothing = smoothing
+        self.tracks = []
+        self.frame_index = 0
+        self._next_id = 1
+
+    def predict(self, frame_width=None, frame_height=None):
+        self.frame_index += 1
+        for track in self.tracks:
+            track.box = track.box + track.velocity
+            if frame_width is not None:
+                track.box[[0, 2]] = np.clip(track.box[[0, 2]], 0, frame_width)
+                track.box[[1, 3]] = np.clip(track.box[[1, 3]], 0, frame_height)
+        # Drop tracks that drifted out of view
+        self.tracks = [t for t in self.tracks if t.box[2] > t.box[0] and t.box[3] > t.box[1]]
+
+    def update(self, detections):
+        # detections: N x 6 array of x1, y1, x2, y2, confidence, class.
+        # Returns the track ID assigned to each detection.
+        assigned = [None] * len(detections)
+        boxes = np.array([t.box for t in self.tracks]).reshape(-1, 4)
+        iou = box_iou(boxes, detections[:, :4]) if len(boxes) and len(detections) else np.zeros((len(boxes), len(detections)))
+        if iou.size:
+            track_classes = np.array([t.class_id for t in self.tracks])
+            iou[track_classes[:, None] != detections[None, :, 5].astype(int)] = 0
+
+        matched_tracks = set()
+        matched_detections = set()
+        for i, j in greedy_match(iou, self.iou_threshold):
+            track = self.tracks[i]
+            box = detections[j, :4].astype(np.float32)
+            elapsed = max(self.frame_index - track.observed_frame, 1)
+            velocity = (box - track.observed_box) / elapsed
+            track.velocity = self.smoothing * track.velocity + (1 - self.smoothing) * velocity
+            track.box = box
+            track.observed_box = box.copy()
+            track.observed_frame = self.frame_index
+            track.confidence = float(detections[j, 4])
+            track.misses = 0
+            assigned[j] = track.id
+            matched_tracks.add(i)
+            matched_detections.add(j)
+
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for j in range(len(detections)):
+            if j not in matched_detections:
+                self.tracks.append(Track(self._next_id, detections[j, :4], float(detections[j, 4]),
+                                         int(detections[j, 5]), self.frame_index))
+                assigned[j] = self._next_id
+                self._next_id += 1
+        return assigned
+
+    def tracks_array(self):
+        # Only tracks confirmed by the latest detector run are reported; missed ones linger for
+        # re-association but are not drawn.
+        rows = [[*t.box, t.id, t.confidence, t.class_id] for t in self.tracks if t.misses == 0]
+        return np.array(rows, dtype=np.float32).reshape(-1, 7)
+
+
+class DetectionScheduler:
+    # Decides on which frames the detector runs. With adaptive=True the interval follows the
+    # measured inference time so the detector takes roughly one frame slot out of every N.
+    def __init__(self, detect_every=1, adaptive=False, target_fps=30.0, max_interval=10,
+                 motion_threshold=None):
+        self.interval = max(detect_every, 1)
+        self.adaptive = adaptive
+        self.target_fps = target_fps
+        self.max_interval = max_interval
+        self.motion_threshold = motion_threshold
+        self.inference_time = None
+        self.frames_since_detection = 0
+        self._reference = None
+
+    def _thumbnail(self, frame):
+        return cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (64, 36), interpolation=cv2.INTER_AREA)
+
+    def motion(self, frame):
+        # Mean absolute difference to the frame the detector last saw, on a tiny grey thumbnail
+        if self._reference is None:
+            return float("inf")
+        return float(cv2.absdiff(self._thumbnail(frame), self._reference).mean())
+
+    def should_detect(self, frame):
+        self.frames_since_detection += 1
+        if self._reference is None or self.frames_since_detection >= self.interval:
+            return True
+        return self.motion_threshold is not None and self.motion(frame) > self.motion_threshold
+
+    def record_detection(self, frame, seconds):
+        self.frames_since_detection = 0
+        if self.motion_threshold is not None or self._reference is None:
+            self._reference = self._thumbnail(frame)
+        if self.inference_time is None:
+            self.inference_time = seconds
+        else:
+            self.inference_time = 0.8 * self.inference_time + 0.2 * seconds
+        if self.adaptive:
+            self.interval = min(max(math.ceil(self.inference_time * self.target_fps), 1), self.max_interval)
+
+
+class TrackedDetector:
+    # Drop-in replacement for the model in the frame loops: runs the detector when the scheduler
+    # asks for it and otherwise returns tracker-propagated boxes. Results always carry track IDs.
+    def __init__(self, model, scheduler=None, tracker=None):
+        self.model = model
+        self.scheduler = scheduler or DetectionScheduler()
+        self.tracker = tracker or IoUTracker()
+        self.detector_runs = 0
+        self.frames = 0
+
+    def __call__(self, frame, **kwargs):
+        self.frames += 1
+        frame_height, frame_width = frame.shape[:2]
+        self.tracker.predict(frame_width, frame_height)
+        if self.scheduler.should_detect(frame):
+            start = time.perf_counter()
+            results = self.model(frame, **kwargs)
+            self.scheduler.record_detection(frame, time.perf_counter() - start)
+            self.detector_runs += 1
+            for result in results:
+                data = result.boxes.data.cpu().numpy()
+                self.tracker.update(np.column_stack([data[:, :4], data[:, -2], data[:, -1]]))
+        return [TrackedResult(self.tracker.tracks_array())]
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
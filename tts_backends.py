@@ -0,0 +1,93 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+
+import numpy as np
+
+from audio_dsp import GTTS_SAMPLE_RATE, Audio, decode_mp3, decode_wav, pcm16_to_audio
+
+
+class SpeechBackend:
+    # Turns one sentence into an audio_dsp.Audio. Backends only synthesize; splitting, caching,
+    # speed changes and playback are shared in speech.SpeechService.
+    name = None
+
+    def synthesize(self, text, lang="en"):
+        raise NotImplementedError
+
+
+class GTTSBackend(SpeechBackend):
+    # Google Translate TTS, needs a network round-trip per sentence
+    name = "gtts"
+
+    def synthesize(self, text, lang="en"):
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text, lang=lang).write_to_fp(buffer)
+        return decode_mp3(buffer.getvalue())
+
+
+class EspeakBackend(SpeechBackend):
+    # Local formant synthesizer; robotic but instant and fully offline
+    name = "espeak"
+
+    def __init__(self, executable=None, voice=None):
+        self.executable = executable or shutil.which("espeak-ng") or shutil.which("espeak")
+        if self.executable is None:
+            raise RuntimeError("espeak-ng is not installed")
+        self.voice = voice
+
+    def synthesize(self, text, lang="en"):
+        command = [self.executable, "-v", self.voice or lang, "--stdout", text]
+        wav = subprocess.run(command, check=True, capture_output=True).stdout
+        return decode_wav(wav)
+
+
+class PiperBackend(SpeechBackend):
+    # Local neural TTS (https://github.com/rhasspy/piper) with a downloaded .onnx voice
+    name = "piper"
+
+    def __init__(self, model_path=None, executable=None):
+        self.model_path = model_path or os.environ.get("VISUAI_PIPER_MODEL")
+        if not self.model_path:
+            raise RuntimeError("Set VISUAI_PIPER_MODEL to a piper voice (.onnx) to use the piper backend")
+        self.executable = executable or shutil.which("piper")
+        if self.executable is None:
+            raise RuntimeError("piper is not installed")
+        with open(self.model_path + ".json") as f:
+            self.sample_rate = json.load(f)["audio"]["sample_rate"]
+
+    def synthesize(self, text, lang="en"):
+        command = [self.executable, "--model", self.model_path, "--output-raw"]
+        raw = subprocess.run(command, input=text.encode("utf-8"), check=True, capture_output=True).stdout
+        return pcm16_to_audio(raw, self.sample_rate)
+
+
+class SilentBackend(SpeechBackend):
+    # Offline stand-in for benchmarks and CI: silence as long as the text would take to say
+    name = "silent"
+
+    def __init__(self, words_per_minute=160, sample_rate=GTTS_SAMPLE_RATE):
+        self.words_per_minute = words_per_minute
+        self.sample_rate = sample_rate
+
+    def synthesize(self, text, lang="en"):
+        duration = max(len(text.split()), 1) * 60.0 / self.words_per_minute
+        return Audio(np.zeros(int(duration * self.sample_rate), dtype=np.float32), self.sample_rate)
+
+
+BACKENDS = {
+    "gtts": GTTSBackend,
+    "espeak": EspeakBackend,
+    "piper": PiperBackend,
+    "silent": SilentBackend,
+}
+
+
+def create_backend(name, **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown speech backend '{name}', expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
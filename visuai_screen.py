@@ -4,21 +4,39 @@ from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.image import Image
 from kivy.clock import Clock
-from kivy.graphics.texture import Texture
-import cv2
 import numpy as np
-from g4f.client import Client
+import os
 import threading
-import sounddevice as sd
-import speech_recognition as sr
-import io
+import time
+from collections import deque
 from kivy.uix.screenmanager import Screen
+from tracking import DetectionScheduler, TrackedDetector
+from pipeline import FramePipeline, StageStats
+from audio_output import PRIORITY_FEEDBACK, get_audio_output
+from speech_input import NoSpeechError, RecognitionError, get_voice_input
+from intents import SceneQueryRouter
+from frame_display import FrameDisplay
+from scene_store import LatestSceneStore, SceneSnapshot
+from preload import Preloader, startup_timer
+import metrics
 
 try:
-    from main import initialize_camera, load_yolo_model, draw_boxes, generate_scene_description, generate_user_query_response, speak_text
+    from main import initialize_camera, load_yolo_model, annotate_frame, generate_scene_description, stream_user_query_response, speak_text
 except ImportError:
     raise ImportError("Error importing functions from main.py")
 
+DESCRIBING_SCENE_PROMPT = "Describing scene"
+PROCESSING_AUDIO_PROMPT = "Processing audio input"
+RESETTING_PROMPT = "Resetting camera and description"
+NOT_UNDERSTOOD_PROMPT = "Sorry, I could not understand the audio."
+REQUEST_ERROR_PROMPT = "Sorry, there was an error with the audio request."
+PROCESSING_ERROR_PROMPT = "There was an error processing your audio input."
+CAMERA_ERROR_PROMPT = "Sorry, the camera or the detection model could not be started."
+
+# Fixed feedback VisuAI speaks at speak_text's default speed, pre-rendered at startup
+SPOKEN_PHRASES = [DESCRIBING_SCENE_PROMPT, PROCESSING_AUDIO_PROMPT, RESETTING_PROMPT, NOT_UNDERSTOOD_PROMPT, REQUEST_ERROR_PROMPT, PROCESSING_ERROR_PROMPT,
+                  CAMERA_ERROR_PROMPT]
+
 class VisuAI(Screen):
     def __init__(self, **kwargs):
         super(VisuAI, self).__init__(**kwargs)
@@ -27,7 +45,26 @@ class VisuAI(Screen):
         self.h_fov = 70.0
         self.camera = None
         self.model = None
-        self.update_event = None
+        self.detector = None
+        self.query_router = None
+        # The most recent annotated frame, shared with the Describe Scene and voice query threads
+        self.scene_store = LatestSceneStore()
+        self.preloader = None
+        # FPS and stage latencies drawn on the video, e.g. VISUAI_OVERLAY=1
+        self.show_overlay = bool(os.environ.get("VISUAI_OVERLAY"))
+        self.pipeline = None
+        # Thread joining the stages of the pipeline that was running when the user last left
+        self._stopping = None
+        self.feed_paused = False
+        # Newest annotated packet waiting for the UI thread; at most one update is scheduled at a time
+        self._ready_packet = None
+        self._update_scheduled = False
+        self._ready_lock = threading.Lock()
+        self.ui_stats = StageStats()
+        self.ui_frame_times = deque(maxlen=120)
+        self.blit_times = deque(maxlen=120)
+        self.ui_event = None
+        self.stats_event = None
 
         # Layout setup
         self.window = GridLayout(cols=1, padding=10, spacing=10)
@@ -44,6 +81,7 @@ class VisuAI(Screen):
         # Add video feed
         self.video_feed = Image(size_hint=(1, 0.5))
         self.window.add_widget(self.video_feed)
+        self.display = FrameDisplay(self.video_feed)
 
         # Add buttons
         self.button_desc = Button(
@@ -79,114 +117,237 @@ class VisuAI(Screen):
 
         self.add_widget(self.window)
 
+    def preload(self):
+        # Called at app start, so the camera is open and the model warm by the time this screen is shown
+        if self.preloader is None:
+            self.preloader = Preloader(lambda: initialize_camera(self.frame_width, self.frame_height), load_yolo_model,
+                                       (self.frame_height, self.frame_width, 3)).start()
+
     def on_enter(self, *args):
-        # Initialize camera and model when entering the screen
-        if not self.camera:
-            self.camera = initialize_camera(self.frame_width, self.frame_height)
-            self.model = load_yolo_model()
-            self.update_event = Clock.schedule_interval(self.update, 1.0 / 30.0)  # 30 FPS
+        # Never block the UI thread on the camera or model; the feed starts as soon as both are ready
+        self.preload()
+        if self.preloader.ready() and not self.pipeline_stopping():
+            self.start_live_feed()
+        else:
+            threading.Thread(target=self.wait_for_preload, daemon=True).start()
+
+    def wait_for_preload(self):
+        self.preloader.result()
+        # The previous pipeline's threads still read the camera until they exit
+        stopping = self._stopping
+        if stopping is not None:
+            stopping.join()
+        Clock.schedule_once(lambda dt: self.start_live_feed())
+
+    def pipeline_stopping(self):
+        return self._stopping is not None and self._stopping.is_alive()
+
+    def start_live_feed(self):
+        if self.pipeline or self.pipeline_stopping() or self.manager is None or self.manager.current != self.name:
+            # Already running, the old pipeline hasn't exited yet, or the user left while the model was loading
+            return
+        if self.detector is None:
+            self.camera, self.model = self.preloader.result()
+            if self.camera is None or not self.camera.isOpened() or self.model is None:
+                self.live_feed_failed()
+                return
+            # Full inference only as often as the model can keep up; boxes are tracked in between
+            self.detector = TrackedDetector(self.model, DetectionScheduler(adaptive=True, target_fps=30.0, motion_threshold=20.0))
+            self.query_router = SceneQueryRouter(self.model.names.values())
+        # Capture, inference and annotation run on worker threads; the UI thread only blits finished frames
+        self.pipeline = FramePipeline(self.camera, self.detector, self.on_frame_annotated)
+        self.pipeline.start()
+        self.feed_paused = False
+        self.ui_event = Clock.schedule_interval(self.measure_ui_frame, 0)  # every UI frame
+        self.stats_event = Clock.schedule_interval(self.print_stats, 5.0)
+
+    def live_feed_failed(self):
+        # Tell the user, and drop what did load so the next time the screen is shown starts over
+        print("The live feed could not be started")
+        if self.camera:
+            self.camera.release()
+        self.camera, self.model = None, None
+        self.preloader = None
+        self.scene_label.text = CAMERA_ERROR_PROMPT
+        speak_text(CAMERA_ERROR_PROMPT, priority=PRIORITY_FEEDBACK)
 
     def on_leave(self, *args):
-        # Release camera and stop updating when leaving the screen
+        # Stop the workers but keep the camera open, so coming back to this screen is instant
+        if self.ui_event:
+            self.ui_event.cancel()
+            self.ui_event = None
+        if self.stats_event:
+            self.stats_event.cancel()
+            self.stats_event = None
+        if self.pipeline:
+            # Joining the stages can take as long as one inference, so it happens off the UI thread
+            self._stopping = threading.Thread(target=self.pipeline.stop, kwargs={"timeout": None},
+                                              name="pipeline-stop", daemon=True)
+            self._stopping.start()
+            self.pipeline = None
+        self.scene_store.clear()
+        print(f"Video display: {self.display.stats()}")
+
+    def shutdown(self):
+        # Release the camera when the app closes
+        self.on_leave()
+        if self._stopping is not None:
+            # Don't release the camera under a capture thread that is still reading it
+            self._stopping.join(timeout=2.0)
         if self.camera:
             self.camera.release()
             self.camera = None
-        if self.update_event:
-            self.update_event.cancel()
-            self.update_event = None
+
+    def on_frame_annotated(self, packet):
+        # Render thread: draw boxes and build descriptions, then hand the frame to the UI thread
+        object_descriptions, scene_summary, objects = annotate_frame(
+            packet.frame, packet.results or [], self.model, self.h_fov, self.frame_width, self.frame_height
+        )
+        self.scene_store.publish(SceneSnapshot(packet.index, packet.captured_at, packet.frame, objects,
+                                               object_descriptions, scene_summary))
+        startup_timer.mark("first_detection")
+        if self.show_overlay:
+            metrics.draw_overlay(packet.frame)
+        with self._ready_lock:
+            self._ready_packet = packet
+            if self._update_scheduled:
+                return
+            self._update_scheduled = True
+        Clock.schedule_once(self.update)
 
     def update(self, dt):
-        ret, frame = self.camera.read()
-        if ret:
-            results = self.model(frame, agnostic_nms=True)
-            if results:
-                object_descriptions, scene_summary = draw_boxes(
-                    frame, results, self.model, self.h_fov, self.frame_width, self.frame_height
-                )
-
-            # Convert image to texture
-            buf1 = cv2.flip(frame, 0)
-            buf = buf1.tobytes()
-            texture = Texture.create(size=(frame.shape[1], frame.shape[0]), colorfmt='bgr')
-            texture.blit_buffer(buf, colorfmt='bgr', bufferfmt='ubyte')
-            self.video_feed.texture = texture
+        with self._ready_lock:
+            packet = self._ready_packet
+            self._update_scheduled = False
+        if packet is None or self.feed_paused:
+            return
+        start = time.perf_counter()
+        # Upload into the reused texture, downscaled to the widget size
+        self.display.show(packet.frame)
+        self.blit_times.append(time.perf_counter() - start)
+        metrics.observe("blit", self.blit_times[-1])
+
+    def measure_ui_frame(self, dt):
+        # Time between UI frames; stays near 1/60 s when nothing blocks the main thread
+        self.ui_stats.record(dt)
+        self.ui_frame_times.append(dt)
+        metrics.observe("ui_frame", dt)
+
+    def performance_stats(self):
+        frame_times = np.array(self.ui_frame_times) * 1000
+        blit_times = np.array(self.blit_times) * 1000
+        stats = {
+            "ui_fps": self.ui_stats.fps(),
+            "ui_frame_ms_p95": float(np.percentile(frame_times, 95)) if frame_times.size else 0.0,
+            "ui_frame_ms_max": float(frame_times.max()) if frame_times.size else 0.0,
+            "blit_ms": float(blit_times.mean()) if blit_times.size else 0.0,
+        }
+        if self.pipeline:
+            pipeline_stats = self.pipeline.stats()
+            stats["inference_fps"] = pipeline_stats["inference"]["fps"]
+            stats["inference_dropped"] = pipeline_stats["capture"]["dropped"]
+            stats["latency_ms"] = pipeline_stats["render"]["latency_ms"]
+        return stats
+
+    def print_stats(self, dt):
+        print(f"VisuAI: {self.performance_stats()}")
 
     def on_button_click(self, instance):
-        # Stop updating the video feed
-        if self.update_event:
-            self.update_event.cancel()
+        # Pause the video feed
+        self.feed_paused = True
 
         # Announce button action
-        speak_text("Describing scene")
+        speak_text(DESCRIBING_SCENE_PROMPT, priority=PRIORITY_FEEDBACK)
 
         # Start the scene description process in a separate thread
         threading.Thread(target=self.describe_scene).start()
 
     def describe_scene(self):
-        ret, frame = self.camera.read()
-        if ret:
-            results = self.model(frame, agnostic_nms=True)
-            if results:
-                object_descriptions, scene_summary = draw_boxes(
-                    frame, results, self.model, self.h_fov, self.frame_width, self.frame_height
-                )
-                scene_description = generate_scene_description(object_descriptions, scene_summary)
-                # Update UI on the main thread
-                self.scene_label.text = scene_description
-                speak_text(scene_description)
-                print(scene_description)
+        # The live loop has already detected and described the current frame; no second inference here
+        snapshot = self.scene_store.get(max_age=1.0, timeout=2.0)
+        if snapshot is None:
+            return
+        print(f"Describing frame {snapshot.index} from {self.scene_store.age(snapshot) * 1000:.0f} ms ago")
+        scene_description = generate_scene_description(snapshot.object_descriptions, snapshot.scene_summary)
+        if scene_description is None:
+            # A newer description request replaced this one
+            return
+        self.set_scene_text(scene_description)
+        speak_text(scene_description)
+        print(scene_description)
+
+    def set_scene_text(self, text):
+        # Widgets may only be touched from the Kivy thread
+        Clock.schedule_once(lambda dt: setattr(self.scene_label, 'text', text))
+
+    def on_wake_word(self):
+        self.on_audio_click(None)
 
     def on_audio_click(self, instance):
-        # Stop updating the video feed
-        if self.update_event:
-            self.update_event.cancel()
+        # Pause the video feed
+        self.feed_paused = True
 
         # Announce button action
-        speak_text("Processing audio input")
+        prompt_id = speak_text(PROCESSING_AUDIO_PROMPT, priority=PRIORITY_FEEDBACK)
 
         # Start the audio processing in a separate thread
-        threading.Thread(target=self.process_audio).start()
-
-    def process_audio(self):
-        recognizer = sr.Recognizer()
-        with sr.Microphone() as source:
-            print("Adjusting for ambient noise...")
-            recognizer.adjust_for_ambient_noise(source)
-            print("Listening...")
-
-            try:
-                # Listen for audio input
-                audio_data = recognizer.listen(source, timeout=10)  # Listen for up to 10 seconds
-                
-                # Recognize the speech using Google Web Speech API
-                user_query = recognizer.recognize_google(audio_data)
-                
-                # Announce what the user said
-                speak_text(f"You said: {user_query}")
-                
-                # Generate and speak the response
-                response = generate_user_query_response(user_query)
-                # Update UI on the main thread
-                self.scene_label.text = response
-                speak_text(response)
-                print(response)
-                
-            except sr.UnknownValueError:
-                print("Sorry, I could not understand the audio.")
-                speak_text("Sorry, I could not understand the audio.")
-            except sr.RequestError as e:
-                print(f"Could not request results; {e}")
-                speak_text("Sorry, there was an error with the audio request.")
-            except Exception as e:
-                print(f"An error occurred during audio processing: {e}")
-                speak_text("There was an error processing your audio input.")
+        threading.Thread(target=self.process_audio, args=(prompt_id,)).start()
+
+    def process_audio(self, prompt_id=None):
+        # The microphone stays open and calibrated between presses, so listening starts as soon as
+        # the prompt has finished playing; otherwise the app would record its own voice
+        if prompt_id is not None:
+            get_audio_output().wait(prompt_id, timeout=10)
+        print("Listening...")
+        try:
+            # Listen for up to 10 seconds; decoding runs while the user speaks. No pre-roll, which
+            # would only hold the end of the prompt.
+            transcript = get_voice_input().listen(timeout=10, preroll_ms=0)
+            user_query = transcript.text
+            print(f"Recognized in {transcript.latency * 1000:.0f} ms after end of speech")
+
+            # Announce what the user said
+            speak_text(f"You said: {user_query}", priority=PRIORITY_FEEDBACK)
+
+            # Count, location and colour questions are answered from the last frame; the rest go to the LLM
+            start = time.perf_counter()
+            snapshot = self.scene_store.latest()
+            objects = snapshot.objects if snapshot is not None else []
+            response = self.query_router.answer(user_query, objects) if self.query_router else None
+            if response is None:
+                # The first sentence of the LLM's answer is spoken while the rest is still being generated
+                speak_text(self.show_streamed_response(stream_user_query_response(user_query, objects)))
+                return
+            print(f"Answered locally in {(time.perf_counter() - start) * 1000:.1f} ms")
+            self.set_scene_text(response)
+            speak_text(response)
+            print(response)
+
+        except NoSpeechError:
+            print("Sorry, I could not understand the audio.")
+            speak_text(NOT_UNDERSTOOD_PROMPT, priority=PRIORITY_FEEDBACK)
+        except RecognitionError as e:
+            print(f"Could not request results; {e}")
+            speak_text(REQUEST_ERROR_PROMPT, priority=PRIORITY_FEEDBACK)
+        except Exception as e:
+            print(f"An error occurred during audio processing: {e}")
+            speak_text(PROCESSING_ERROR_PROMPT, priority=PRIORITY_FEEDBACK)
+
+    def show_streamed_response(self, sentences):
+        # Passes sentences on to speech and grows the label with them; nothing is shown when
+        # a newer query replaced this one
+        shown = []
+        for sentence in sentences:
+            shown.append(sentence)
+            self.set_scene_text(" ".join(shown))
+            yield sentence
+        if shown:
+            print(" ".join(shown))
 
     def on_reset_click(self, instance):
-        # Restart updating the video feed
-        if self.update_event:
-            self.update_event.cancel()
-        self.update_event = Clock.schedule_interval(self.update, 1.0 / 30.0)  # 30 FPS
+        # Resume showing the video feed
+        self.feed_paused = False
         
         # Reset camera and clear description
         self.scene_label.text = ""
-        speak_text("Resetting camera and description")
+        speak_text(RESETTING_PROMPT, priority=PRIORITY_FEEDBACK)